@@ -1,5 +1,10 @@
 #!/bin/sh
-python ./manage.py migrate
-python ./manage.py runserver 0.0.0.0:8000
+# Only run migrate when there are unapplied migrations.
+python ./manage.py migrate --check --skip-checks > /dev/null \
+    || python ./manage.py migrate
+python ./manage.py run_poll_scheduler &
 
-gunicorn mysite.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+if [ "$DEBUG" = "True" ]; then
+    exec python ./manage.py runserver 0.0.0.0:8000
+fi
+exec gunicorn mysite.wsgi:application -c gunicorn.conf.py
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for mysite.
+
+The app is loaded once in the master before workers are forked, so every
+worker starts with Django already imported (and caches already warmed
+when WARM_POLLS_ON_STARTUP is set) instead of importing it again.
+
+Workers are threaded, so while one thread hashes a login password, which
+releases the GIL, the worker's other threads keep serving votes.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS",
+                             multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Don't hand connections opened while preloading down to the workers.
+    from django.db import connections
+    connections.close_all()
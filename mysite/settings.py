@@ -10,8 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,11 +30,16 @@ DEBUG = config("DEBUG", cast=bool, default=True)
 ALLOWED_HOSTS = config("ALLOW_HOSTS", default="localhost,127.0.0.1").split(",")
 
 
+# Deployment profile: "full" runs everything, "voting" leaves out the
+# admin site, and the password change and reset pages that need its
+# templates, so voting workers boot faster.
+DEPLOYMENT_PROFILE = config("DEPLOYMENT_PROFILE", default="full")
+
+
 # Application definition
 
 INSTALLED_APPS = [
     'polls.apps.PollsConfig',
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -41,12 +47,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+if DEPLOYMENT_PROFILE == "full":
+    INSTALLED_APPS.insert(1, 'django.contrib.admin')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'polls.auth.LoginThrottledMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,9 +85,12 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+DATABASE_ENGINE = config("DATABASE_ENGINE",
+                         default="django.db.backends.postgresql")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": DATABASE_ENGINE,
         "NAME": config("DATABASE_NAME", default="appdb"),
         "USER": config("DATABASE_USERNAME", default="user"),
         "PASSWORD": config("DATABASE_PASSWORD", default="password"),
@@ -86,6 +99,60 @@ DATABASES = {
     }
 }
 
+# Read replicas: a comma-separated list of replica hosts, or of database
+# files when DATABASE_ENGINE is SQLite (handy for trying routing locally).
+READ_REPLICAS = []
+for number, replica in enumerate(config("DATABASE_REPLICAS", default="",
+                                        cast=Csv()), start=1):
+    location = "NAME" if "sqlite" in DATABASE_ENGINE else "HOST"
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        location: replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    READ_REPLICAS.append(f"replica{number}")
+
+if READ_REPLICAS:
+    # Only needed to honour the sticky-primary window.
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.sessions.middleware.'
+                         'SessionMiddleware') + 1,
+        'polls.routers.PrimaryPinMiddleware')
+
+DATABASE_ROUTERS = ['polls.routers.PrimaryReplicaRouter']
+
+# Seconds a user keeps reading from the primary after they vote.
+PRIMARY_STICKY_SECONDS = config("PRIMARY_STICKY_SECONDS", cast=int, default=5)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Whether every server process, the poll scheduler and warm_polls see the
+# same cache. Votes, the scheduler and warm_polls can only update or drop
+# cached pages in the cache they see, so the polls caches, their warming
+# and per-user vote maps are only used when it is shared; otherwise every
+# request reads the database.
+CACHE_SHARED = config(
+    "CACHE_SHARED", cast=bool,
+    default=not CACHES["default"]["BACKEND"].endswith(
+        (".LocMemCache", ".DummyCache")))
+
+# Warm the caches of the most recent or open polls when a worker starts
+# (needs a shared cache).
+WARM_POLLS_ON_STARTUP = config("WARM_POLLS_ON_STARTUP", cast=bool,
+                               default=False)
+WARM_POLLS_COUNT = config("WARM_POLLS_COUNT", cast=int, default=20)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -105,11 +172,51 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing profiles. The first hasher hashes new and upgraded
+# passwords, the rest can still verify older hashes, which are re-hashed
+# with the first one on the user's next login. The tuned hashers keep
+# hashes of their own algorithm that are already costlier than theirs.
+# "tuned" holds the OWASP-recommended security level for less CPU per
+# login than "default" (Django's own list); its Argon2 needs argon2-cffi.
+PASSWORD_HASHER_PROFILES = {
+    "default": [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+    "tuned": [
+        'polls.hashers.TunedArgon2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+    "tuned-pbkdf2": [
+        'polls.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    config("PASSWORD_HASHING_PROFILE", default="tuned")]
+
 AUTHENTICATION_BACKENDS = [
-    # username & password authentication
-   'django.contrib.auth.backends.ModelBackend',
+    # username & password authentication, with a bounded hashing pool
+   'polls.auth.PooledModelBackend',
 ]
 
+# Password hashes computed at once by all server processes of a host (by
+# each process without a shared cache), logins of a process allowed to
+# wait for one, and seconds a login may wait before it is asked to try
+# again.
+LOGIN_HASH_WORKERS = config("LOGIN_HASH_WORKERS", cast=int,
+                            default=max(1, (os.cpu_count() or 2) // 2))
+LOGIN_HASH_QUEUE = config("LOGIN_HASH_QUEUE", cast=int,
+                          default=4 * LOGIN_HASH_WORKERS)
+LOGIN_HASH_TIMEOUT = config("LOGIN_HASH_TIMEOUT", cast=float, default=10.0)
+
 LOGIN_REDIRECT_URL = 'polls:index'  # after login, show list of polls
 LOGOUT_REDIRECT_URL = 'login'       # after logout, return to login page
 
@@ -155,6 +262,8 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': 'polls.log',
             'formatter': 'details',
+            # Open the log file on the first record, not at startup.
+            'delay': True,
         },
         'console': {
             'level': 'INFO',
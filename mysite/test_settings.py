@@ -0,0 +1,32 @@
+"""
+Django settings for running the mysite test suite.
+
+Uses an in-memory SQLite database unless TEST_SQLITE is False, and a fast
+password hasher since tests don't need hashes that resist cracking.
+"""
+
+from decouple import config
+from .settings import *  # noqa
+
+if config("TEST_SQLITE", cast=bool, default=True):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+    }
+else:
+    DATABASES = {"default": DATABASES["default"]}
+
+# A replica mirroring the primary, only used by tests that route reads
+# to it; every other test runs on the primary alone.
+DATABASES["replica1"] = {**DATABASES["default"],
+                         "TEST": {"MIRROR": "default"}}
+READ_REPLICAS = []
+
+# The test process is the only one using its cache.
+CACHE_SHARED = True
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
@@ -15,13 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
+from django.apps import apps
+from django.contrib.auth import views as auth_views
 from django.urls import include, path
 from django.views.generic.base import RedirectView
+from polls.views import LoginView
 
 urlpatterns = [
     path('', RedirectView.as_view(url='/polls', permanent=False), name='index_redirect'),
     path('polls/', include('polls.urls')),
-    path('admin/', admin.site.urls),
-    path('accounts/', include('django.contrib.auth.urls')),
+    path('accounts/login/', LoginView.as_view(), name='login'),
 ]
+
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns += [
+        path('accounts/', include('django.contrib.auth.urls')),
+        path('admin/', admin.site.urls),
+    ]
+else:
+    # The password change and reset pages use the admin app's templates,
+    # so without it (the "voting" profile) only login and logout are served.
+    urlpatterns.append(
+        path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'))
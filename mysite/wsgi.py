@@ -7,10 +7,21 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
 application = get_wsgi_application()
+
+if settings.WARM_POLLS_ON_STARTUP:
+    if settings.CACHE_SHARED:
+        from polls.cache import warm_polls
+        warm_polls(settings.WARM_POLLS_COUNT)
+    else:
+        logging.getLogger("polls").warning(
+            "WARM_POLLS_ON_STARTUP is set but the cache is not shared "
+            "(CACHE_SHARED), so nothing was warmed")
@@ -0,0 +1,144 @@
+"""
+Cross-question analytics for the polls application.
+
+Votes are streamed from the database as (user_id, question_id,
+choice_id) triples into compact NumPy integer arrays. Turnout, cross-tabs
+and voter overlap are then computed with vectorized operations instead
+of looping over Vote, Choice and Question objects.
+"""
+
+import itertools
+import numpy as np
+from django.contrib.auth.models import User
+from django.db.models import Max
+from .models import Choice, Vote
+
+
+STREAM_CHUNK_SIZE = 50000
+OVERLAP_CHUNK_SIZE = 100000
+
+
+class VoteArrays:
+    """
+    The votes as three parallel integer arrays, one row per vote.
+
+    Attributes:
+        users (ndarray): The user ID of each vote.
+        questions (ndarray): The question ID of each vote.
+        choices (ndarray): The choice ID of each vote.
+    """
+
+    def __init__(self, users, questions, choices):
+        self.users = users
+        self.questions = questions
+        self.choices = choices
+
+    def __len__(self):
+        return len(self.users)
+
+    def of_question(self, question_id):
+        """Return the (users, choices) arrays of one question's votes."""
+        rows = self.questions == question_id
+        return self.users[rows], self.choices[rows]
+
+
+def _id_dtype(max_id):
+    """Return the narrowest integer dtype holding IDs up to max_id."""
+    return np.int32 if (max_id or 0) < np.iinfo(np.int32).max else np.int64
+
+
+def load_votes(question_ids=None):
+    """
+    Stream votes from the database into integer arrays.
+
+    Rows are fetched in chunks and written straight into a flat integer
+    array, so no Python object is kept per vote.
+    :param question_ids: Only load the votes of these questions.
+    :return: A VoteArrays of the votes.
+    """
+    votes = Vote.objects.all()
+    if question_ids is not None:
+        votes = votes.filter(choice__question_id__in=question_ids)
+    widest = votes.aggregate(user=Max('user_id'),
+                             question=Max('choice__question_id'),
+                             choice=Max('choice_id'))
+    dtype = _id_dtype(max(max_id or 0 for max_id in widest.values()))
+    rows = votes.values_list('user_id', 'choice__question_id', 'choice_id')
+    flat = np.fromiter(
+        itertools.chain.from_iterable(
+            rows.iterator(chunk_size=STREAM_CHUNK_SIZE)),
+        dtype=dtype)
+    table = flat.reshape(-1, 3)
+    return VoteArrays(table[:, 0].copy(), table[:, 1].copy(),
+                      table[:, 2].copy())
+
+
+def turnout(votes, total_users=None):
+    """
+    Return the number of voters and participation rate of each question.
+    :param votes: The VoteArrays to count.
+    :param total_users: The number of eligible users, defaults to all
+    active users.
+    :return: A dict of question id to (voters, participation rate).
+    """
+    if total_users is None:
+        total_users = User.objects.filter(is_active=True).count()
+    question_ids, voters = np.unique(votes.questions, return_counts=True)
+    rates = voters / total_users if total_users else np.zeros(len(voters))
+    return {int(question_id): (int(count), float(rate))
+            for question_id, count, rate in zip(question_ids, voters, rates)}
+
+
+def crosstab(votes, question_a, question_b):
+    """
+    Count how the voters of one question voted on another.
+    :param votes: The VoteArrays to count.
+    :param question_a: The question ID of the table rows.
+    :param question_b: The question ID of the table columns.
+    :return: The choice IDs of question_a, the choice IDs of question_b,
+    and a table whose [i, j] cell counts the users who chose the i-th
+    choice of question_a and the j-th choice of question_b.
+    """
+    choices_a = _choice_ids(question_a)
+    choices_b = _choice_ids(question_b)
+    users_a, voted_a = votes.of_question(question_a)
+    users_b, voted_b = votes.of_question(question_b)
+    _, rows_a, rows_b = np.intersect1d(users_a, users_b,
+                                       return_indices=True)
+    cells = (np.searchsorted(choices_a, voted_a[rows_a]) * len(choices_b)
+             + np.searchsorted(choices_b, voted_b[rows_b]))
+    table = np.bincount(cells, minlength=len(choices_a) * len(choices_b))
+    return choices_a, choices_b, table.reshape(len(choices_a),
+                                               len(choices_b))
+
+
+def overlap(votes, question_ids):
+    """
+    Count the voters shared by each pair of questions.
+    :param votes: The VoteArrays to count.
+    :param question_ids: The question IDs to compare, without repeats.
+    :return: A square table whose [i, j] cell counts the users who voted
+    on both the i-th and the j-th question.
+    """
+    question_ids = np.asarray(question_ids)
+    rows = np.isin(votes.questions, question_ids)
+    _, user_index = np.unique(votes.users[rows], return_inverse=True)
+    # Column of each vote: the position of its question in question_ids.
+    by_id = np.argsort(question_ids)
+    column = by_id[np.searchsorted(question_ids[by_id],
+                                   votes.questions[rows])]
+    voted = np.zeros((user_index.max(initial=-1) + 1, len(question_ids)),
+                     dtype=np.bool_)
+    voted[user_index, column] = True
+    # Multiply a block of users at a time to bound the float copies.
+    shared = np.zeros((len(question_ids), len(question_ids)), dtype=np.int64)
+    for start in range(0, len(voted), OVERLAP_CHUNK_SIZE):
+        block = voted[start:start + OVERLAP_CHUNK_SIZE].astype(np.float32)
+        shared += np.rint(block.T @ block).astype(np.int64)
+    return shared
+
+
+def _choice_ids(question_id):
+    """Return the sorted choice IDs of a question."""
+    return np.array(sorted(Choice.objects.filter(question_id=question_id)
+                           .values_list('id', flat=True)), dtype=np.int64)
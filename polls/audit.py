@@ -0,0 +1,83 @@
+"""
+Vote audit trail for the polls application.
+
+Every vote, first or changed, is appended to the VoteEvent table in the
+same transaction that saves the vote, so a vote is never recorded
+without its event. A ballot writes the events of all its votes with one
+insert. Replaying the events rebuilds the tallies as of any moment, and
+the events are also folded into the vote history buckets.
+"""
+
+import ipaddress
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.utils import timezone
+from .models import VoteEvent
+from .rollup import apply_events
+
+
+def record_vote_event(user_id, question_id, old_choice_id, new_choice_id,
+                      ip):
+    """
+    Append one vote to the audit log.
+    :param user_id: The ID of the voter.
+    :param question_id: The ID of the question.
+    :param old_choice_id: The previous choice ID, None for a first vote.
+    :param new_choice_id: The ID of the choice voted for.
+    :param ip: The address the vote came from.
+    """
+    record_vote_events(user_id, [(question_id, old_choice_id,
+                                  new_choice_id)], ip)
+
+
+def record_vote_events(user_id, votes, ip):
+    """
+    Append several votes of a user to the audit log with one insert.
+
+    Call it inside the transaction saving the votes, so the votes and
+    their events are committed or rolled back together.
+    :param user_id: The ID of the voter.
+    :param votes: Iterable of (question_id, old_choice_id, new_choice_id)
+    tuples, old_choice_id being None for a first vote.
+    :param ip: The address the votes came from.
+    """
+    ts = timezone.now()
+    ip = _valid_ip(ip)
+    events = [VoteEvent(user_id=user_id, question_id=question_id,
+                        old_choice_id=old_choice_id,
+                        new_choice_id=new_choice_id, ts=ts, ip=ip)
+              for question_id, old_choice_id, new_choice_id in votes]
+    with transaction.atomic():
+        VoteEvent.objects.bulk_create(events)
+        apply_events((event.question_id, event.old_choice_id,
+                      event.new_choice_id, event.ts) for event in events)
+
+
+def _valid_ip(ip):
+    """Return the address if it is a valid IP, otherwise None."""
+    try:
+        return str(ipaddress.ip_address(ip.strip()))
+    except (AttributeError, ValueError):
+        return None
+
+
+def tallies_as_of(as_of=None, question_id=None):
+    """
+    Rebuild vote tallies by replaying the event log.
+    :param as_of: Replay the events up to this time, defaults to all.
+    :param question_id: Only replay the events of this question.
+    :return: A dict of question id to a Counter of choice id to votes.
+    """
+    events = VoteEvent.objects.order_by('ts', 'id')
+    if as_of is not None:
+        events = events.filter(ts__lte=as_of)
+    if question_id is not None:
+        events = events.filter(question_id=question_id)
+    current = {}
+    for user_id, event_question_id, choice_id in events.values_list(
+            'user_id', 'question_id', 'new_choice_id').iterator():
+        current[user_id, event_question_id] = choice_id
+    tallies = defaultdict(Counter)
+    for (_, event_question_id), choice_id in current.items():
+        tallies[event_question_id][choice_id] += 1
+    return dict(tallies)
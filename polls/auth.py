@@ -0,0 +1,184 @@
+"""
+Authentication for the polls application.
+
+Password hashing is deliberately slow, so a burst of logins can keep
+every server thread busy hashing while votes wait. The backend here only
+lets LOGIN_HASH_WORKERS hashes run at once on each host. With a shared
+cache (``settings.CACHE_SHARED``) the limit holds across every server
+process of the host, otherwise it holds per process. Hashing releases
+the GIL, so with the threaded gunicorn workers of gunicorn.conf.py the
+other threads of a worker keep serving votes while one of them hashes.
+
+A login that can't get a hashing slot in time raises LoginThrottled,
+which the login view, or LoginThrottledMiddleware for any other login
+page such as the admin's, turns into a "try again" response rather than
+a failed login.
+"""
+
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+
+logger = logging.getLogger("polls")
+
+# Seconds before the slot of a process that died while hashing frees up.
+HASH_SLOT_TIMEOUT = 60
+# Waiting logins retry after this many seconds, doubling up to the max.
+HASH_SLOT_WAIT_INTERVAL = 0.05
+HASH_SLOT_MAX_WAIT_INTERVAL = 0.5
+# Seconds a login refused for lack of a hashing slot is told to wait.
+LOGIN_RETRY_AFTER = 5
+
+_semaphores = None
+_semaphores_lock = threading.Lock()
+
+
+class LoginThrottled(Exception):
+    """Raised when a login can't get a password hashing slot in time."""
+
+
+def hash_slot_key(number):
+    """
+    Return the cache key held by a login while it uses a hashing slot.
+
+    Slots are per host, as LOGIN_HASH_WORKERS is sized to one host's
+    cores, so adding hosts adds login capacity.
+    """
+    return f'polls:login_hash_slot:{socket.gethostname()}:{number}'
+
+
+@receiver(setting_changed)
+def reset_hash_slots(*, setting, **kwargs):
+    """Rebuild the per-process slots when their settings change."""
+    global _semaphores
+    if setting.startswith('LOGIN_HASH_'):
+        with _semaphores_lock:
+            _semaphores = None
+
+
+def _get_semaphores():
+    """Return this process' (slots, waiting logins) semaphores."""
+    global _semaphores
+    with _semaphores_lock:
+        if _semaphores is None:
+            _semaphores = (
+                threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS),
+                threading.BoundedSemaphore(settings.LOGIN_HASH_QUEUE))
+        return _semaphores
+
+
+def _try_take_slot(slots):
+    """Take a free hashing slot, returning its release function or None."""
+    if not settings.CACHE_SHARED:
+        return slots.release if slots.acquire(blocking=False) else None
+    for number in range(settings.LOGIN_HASH_WORKERS):
+        key = hash_slot_key(number)
+        if cache.add(key, True, HASH_SLOT_TIMEOUT):
+            return partial(cache.delete, key)
+    return None
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Hold a password hashing slot for the duration of the block.
+
+    Up to LOGIN_HASH_QUEUE logins of this process may wait for a slot,
+    for at most LOGIN_HASH_TIMEOUT seconds.
+    :raise LoginThrottled: If no slot could be taken.
+    """
+    slots, waiting = _get_semaphores()
+    release = _try_take_slot(slots)
+    if release is None:
+        if not waiting.acquire(blocking=False):
+            logger.warning("Login refused: too many logins waiting to hash")
+            raise LoginThrottled
+        try:
+            deadline = time.monotonic() + settings.LOGIN_HASH_TIMEOUT
+            interval = HASH_SLOT_WAIT_INTERVAL
+            while release is None and time.monotonic() < deadline:
+                time.sleep(min(interval, max(deadline - time.monotonic(),
+                                             0)))
+                interval = min(interval * 2, HASH_SLOT_MAX_WAIT_INTERVAL)
+                release = _try_take_slot(slots)
+        finally:
+            waiting.release()
+        if release is None:
+            logger.warning("Login refused: no password hashing slot freed up")
+            raise LoginThrottled
+    try:
+        yield
+    finally:
+        release()
+
+
+class LoginThrottledMiddleware:
+    """
+    Answer a login refused for lack of a hashing slot with "try again".
+
+    Covers the login pages without their own handling, such as the admin
+    site's, which would otherwise fail with a server error.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, LoginThrottled):
+            response = HttpResponse("Too many people are logging in right "
+                                    "now, please try again in a moment.",
+                                    content_type='text/plain', status=503)
+            response['Retry-After'] = str(LOGIN_RETRY_AFTER)
+            return response
+        return None
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that only hashes passwords while holding a slot of the
+    bounded login hashing pool.
+
+    A password stored with an outdated hasher or work factor is re-hashed
+    with the preferred one on the user's next successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so a missing user takes as long as a wrong
+            # password (#20760).
+            with hashing_slot():
+                make_password(password)
+            return None
+        with hashing_slot():
+            is_correct, must_update = verify_password(password,
+                                                      user.password)
+            can_login = is_correct and self.user_can_authenticate(user)
+            if can_login and must_update:
+                user.password = make_password(password)
+        if not can_login:
+            return None
+        if must_update:
+            user.save(update_fields=['password'])
+        return user
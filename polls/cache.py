@@ -0,0 +1,331 @@
+"""
+Caching helpers for the polls application.
+
+Each user's votes are kept as a ``{question_id: choice_id}`` map, loaded
+with a single query and updated in place whenever the user votes. The
+map lives in the shared cache when there is one, otherwise in the
+user's session, which every process reads from the session store.
+
+The index list, each question's choices and its results are cached too.
+Misses go through ``get_or_compute`` so that concurrent requests for the
+same key wait for one recomputation instead of all hitting the database.
+
+Votes, the scheduler and ``warm_polls`` update or drop cached values from
+whichever process they run in, so nothing is cached unless
+``settings.CACHE_SHARED`` says every process sees the same cache. A
+process-local copy would otherwise go stale as soon as another process
+changed the data behind it.
+"""
+
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Question, Choice, Vote
+from .routers import primary
+from .lifecycle import question_closed, question_opened
+
+
+USER_VOTES_TIMEOUT = 60 * 60
+# A session's map is reloaded this often, to pick up votes the user cast
+# from another session.
+SESSION_USER_VOTES_TIMEOUT = 60
+USER_VOTES_SESSION_KEY = 'polls_user_votes'
+POLL_CACHE_TIMEOUT = 5 * 60
+
+# How long a recomputation may hold a key before others stop waiting.
+COMPUTE_LOCK_TIMEOUT = 10
+COMPUTE_WAIT_INTERVAL = 0.05
+
+INDEX_KEY = 'polls:index'
+
+_compute_locks = [threading.Lock() for _ in range(64)]
+
+
+def user_votes_key(user_id):
+    """Return the cache key holding the vote map of a user."""
+    return f'polls:user_votes:{user_id}'
+
+
+def choices_key(question_id):
+    """Return the cache key holding the choices of a question."""
+    return f'polls:choices:{question_id}'
+
+
+def results_key(question_id):
+    """Return the cache key holding the results of a question."""
+    return f'polls:results:{question_id}'
+
+
+def get_or_compute(key, compute, timeout=POLL_CACHE_TIMEOUT):
+    """
+    Return the cached value of a key, computing it once on a miss.
+
+    Threads of this process missing the same key queue on a lock, and
+    other processes wait on a lock key in the cache, so only one of them
+    runs compute() while the rest reuse its result.
+    :param key: The cache key.
+    :param compute: A callable returning the value to cache.
+    :param timeout: Seconds to keep the value in the cache.
+    :return: The cached or freshly computed value.
+    """
+    if not settings.CACHE_SHARED:
+        return compute()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with _compute_locks[hash(key) % len(_compute_locks)]:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        lock_key = f'{key}:lock'
+        owns_lock = cache.add(lock_key, True, COMPUTE_LOCK_TIMEOUT)
+        if not owns_lock:
+            value = _wait_for(key, lock_key)
+            if value is not None:
+                return value
+        try:
+            # Values put in the shared cache are read from the primary, so
+            # a lagging replica can't put back what a change just dropped.
+            with primary():
+                value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+    return value
+
+
+def _wait_for(key, lock_key):
+    """Wait for another process to fill a key, or for its lock to go."""
+    deadline = time.monotonic() + COMPUTE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(COMPUTE_WAIT_INTERVAL)
+        value = cache.get(key)
+        if value is not None or cache.get(lock_key) is None:
+            return value
+    return None
+
+
+def compute_index():
+    """Return the published questions, newest first."""
+    return list(Question.objects.exclude(state=Question.State.SCHEDULED)
+                .order_by('-pub_date'))
+
+
+def compute_choices(question_id):
+    """Return (id, text) pairs of the choices of a question."""
+    return list(Choice.objects.filter(question_id=question_id)
+                .order_by('id').values_list('id', 'choice_text'))
+
+
+def compute_results(question_id):
+    """
+    Return the vote count of each choice of a question in one query.
+
+    Closed questions report the results frozen when they closed.
+    """
+    return compute_results_many([question_id])[question_id]
+
+
+def compute_results_many(question_ids):
+    """Return the results of several questions in one query."""
+    results = {question_id: [] for question_id in question_ids}
+    choices = (Choice.objects.filter(question_id__in=question_ids)
+               .select_related('question').annotate(total=Count('vote'))
+               .order_by('question_id', 'id'))
+    closed = Question.State.CLOSED
+    for choice in choices:
+        results[choice.question_id].append(
+            {'choice_text': choice.choice_text,
+             'votes': (choice.final_votes
+                       if choice.final_votes is not None
+                       and choice.question.state == closed
+                       else choice.total)})
+    return results
+
+
+def get_index():
+    """Return the cached list of published questions."""
+    return get_or_compute(INDEX_KEY, compute_index)
+
+
+def get_choices(question_id):
+    """Return the cached choices of a question."""
+    return get_or_compute(choices_key(question_id),
+                          lambda: compute_choices(question_id))
+
+
+def get_results(question_id):
+    """Return the cached results of a question."""
+    return get_or_compute(results_key(question_id),
+                          lambda: compute_results(question_id))
+
+
+def get_results_many(question_ids):
+    """
+    Return the cached results of several questions.
+
+    The questions missing from the cache are computed together in one
+    query.
+    :param question_ids: The IDs of the questions.
+    :return: A dict of question id to its results.
+    """
+    if not settings.CACHE_SHARED:
+        return compute_results_many(question_ids)
+    keys = {results_key(question_id): question_id
+            for question_id in question_ids}
+    results = {keys[key]: value
+               for key, value in cache.get_many(list(keys)).items()}
+    missing = [question_id for question_id in question_ids
+               if question_id not in results]
+    if missing:
+        with primary():
+            computed = compute_results_many(missing)
+        cache.set_many({results_key(question_id): value
+                        for question_id, value in computed.items()},
+                       POLL_CACHE_TIMEOUT)
+        results.update(computed)
+    return results
+
+
+def warm_question(question_id):
+    """Recompute and cache the choices and results of a question."""
+    if not settings.CACHE_SHARED:
+        return
+    with primary():
+        choices = compute_choices(question_id)
+        results = compute_results(question_id)
+    cache.set(choices_key(question_id), choices, POLL_CACHE_TIMEOUT)
+    cache.set(results_key(question_id), results, POLL_CACHE_TIMEOUT)
+
+
+def warm_polls(count):
+    """
+    Fill the cache for the index page and the hottest questions.
+    :param count: How many questions to warm, open ones first and then
+    the most recently published.
+    :return: The IDs of the warmed questions, none without a shared
+    cache.
+    """
+    if not settings.CACHE_SHARED:
+        return []
+    with primary():
+        cache.set(INDEX_KEY, compute_index(), POLL_CACHE_TIMEOUT)
+    published = Question.objects.exclude(state=Question.State.SCHEDULED)
+    question_ids = list(published.filter(state=Question.State.OPEN)
+                        .order_by('-pub_date')
+                        .values_list('id', flat=True)[:count])
+    if len(question_ids) < count:
+        question_ids += (published.exclude(state=Question.State.OPEN)
+                         .order_by('-pub_date')
+                         .values_list('id', flat=True)
+                         [:count - len(question_ids)])
+    for question_id in question_ids:
+        warm_question(question_id)
+    return question_ids
+
+
+def get_user_votes(user, session=None):
+    """
+    Return a map of the questions a user voted on to the chosen choice.
+    :param user: The user whose votes are wanted.
+    :param session: The user's session, which keeps the map when the
+    cache is not shared.
+    :return: A dict of question id to choice id.
+    """
+    if not user.is_authenticated:
+        return {}
+    if not settings.CACHE_SHARED:
+        if session is None:
+            return load_user_votes(user)
+        stored = session.get(USER_VOTES_SESSION_KEY)
+        if stored is not None and time.time() < stored['until']:
+            return dict(stored['votes'])
+        user_votes = load_user_votes(user)
+        _store_in_session(session, user_votes)
+        return user_votes
+    key = user_votes_key(user.pk)
+    user_votes = cache.get(key)
+    if user_votes is None:
+        user_votes = load_user_votes(user)
+        cache.set(key, user_votes, USER_VOTES_TIMEOUT)
+    return user_votes
+
+
+def load_user_votes(user):
+    """Return the vote map of a user read from the primary in one query."""
+    # The user's own votes must reflect what they just submitted.
+    with primary():
+        return dict(Vote.objects.filter(user=user).values_list(
+            'choice__question_id', 'choice_id'))
+
+
+def _store_in_session(session, user_votes):
+    # JSON sessions turn int keys into strings, so store pairs instead.
+    session[USER_VOTES_SESSION_KEY] = {
+        'votes': list(user_votes.items()),
+        'until': time.time() + SESSION_USER_VOTES_TIMEOUT}
+
+
+def record_user_vote(user, question_id, choice_id, session=None):
+    """Update the caches after a user votes."""
+    record_user_votes(user, {question_id: choice_id}, session)
+
+
+def record_user_votes(user, votes, session=None):
+    """
+    Update the caches after a user votes on one or more questions.
+    :param user: The user who voted.
+    :param votes: A dict of question id to the chosen choice id.
+    :param session: The user's session, see get_user_votes().
+    """
+    if settings.CACHE_SHARED:
+        user_votes = get_user_votes(user)
+        user_votes.update(votes)
+        cache.set(user_votes_key(user.pk), user_votes, USER_VOTES_TIMEOUT)
+    elif session is not None and USER_VOTES_SESSION_KEY in session:
+        stored = session[USER_VOTES_SESSION_KEY]
+        user_votes = dict(stored['votes'])
+        user_votes.update(votes)
+        session[USER_VOTES_SESSION_KEY] = {'votes': list(user_votes.items()),
+                                           'until': stored['until']}
+    cache.delete_many([results_key(question_id) for question_id in votes])
+
+
+@receiver(post_delete, sender=Vote)
+def forget_user_votes(sender, instance, **kwargs):
+    """Drop the cached vote map of a user whose vote was deleted."""
+    cache.delete(user_votes_key(instance.user_id))
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def forget_question(sender, instance, **kwargs):
+    """Drop the cached pages showing a question that changed."""
+    cache.delete_many([INDEX_KEY, choices_key(instance.pk),
+                       results_key(instance.pk)])
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def forget_choice(sender, instance, **kwargs):
+    """Drop the cached choices and results of a changed choice."""
+    cache.delete_many([choices_key(instance.question_id),
+                       results_key(instance.question_id)])
+
+
+@receiver(question_opened)
+def warm_opened_question(sender, question_id, **kwargs):
+    """Warm the caches of a question as soon as it opens."""
+    cache.delete(INDEX_KEY)
+    warm_question(question_id)
+
+
+@receiver(question_closed)
+def forget_closed_question(sender, question_id, **kwargs):
+    """Drop the cached pages of a question that has just closed."""
+    cache.delete_many([INDEX_KEY, results_key(question_id)])
@@ -0,0 +1,42 @@
+"""
+Password hashers tuned for login bursts.
+
+Both follow the OWASP password storage recommendations, which put them at
+the same security level as Django's defaults for less CPU per login.
+Existing hashes that are already stronger than the tuned parameters are
+kept as they are: a login only ever upgrades a hash, never weakens it.
+"""
+
+from django.contrib.auth.hashers import (Argon2PasswordHasher,
+                                         PBKDF2PasswordHasher,
+                                         must_update_salt)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with 19 MiB of memory, 2 passes and 1 lane."""
+    time_cost = 2
+    memory_cost = 19 * 1024
+    parallelism = 1
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        current = decoded['params']
+        wanted = self.params()
+        # OWASP trades memory for passes, so compare their product, as
+        # in its m=19 MiB, t=2 or m=12 MiB, t=3 equivalents.
+        return (current.type != wanted.type
+                or current.version < wanted.version
+                or current.hash_len < wanted.hash_len
+                or (current.memory_cost * current.time_cost
+                    < wanted.memory_cost * wanted.time_cost)
+                or must_update_salt(decoded['salt'], self.salt_entropy))
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with 600,000 iterations."""
+    iterations = 600000
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (decoded['iterations'] < self.iterations
+                or must_update_salt(decoded['salt'], self.salt_entropy))
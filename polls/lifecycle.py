@@ -0,0 +1,130 @@
+"""
+Poll lifecycle for the polls application.
+
+Questions move from scheduled to open at ``pub_date`` and from open to
+closed at ``end_date``. The scheduler keeps a heap of these upcoming
+events and fires each transition when its time comes, so the request
+path only has to read ``Question.state``.
+"""
+
+import heapq
+import logging
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from .models import Question, Choice
+from .routers import primary
+
+
+logger = logging.getLogger("polls")
+
+# Sent with the question once it has been opened or closed.
+question_opened = Signal()
+question_closed = Signal()
+
+
+def upcoming_events(until):
+    """
+    Return a heap of the transitions due up to the given time.
+    :param until: The latest time of the events to include.
+    :return: A heap of (when, question_id, new state) tuples.
+    """
+    State = Question.State
+    with primary():
+        pending = list(Question.objects.filter(
+            Q(state=State.SCHEDULED, pub_date__lte=until)
+            | Q(state=State.OPEN, end_date__lte=until)
+        ).values_list('id', 'state', 'pub_date', 'end_date'))
+    events = []
+    for question_id, state, pub_date, end_date in pending:
+        if state == State.SCHEDULED:
+            events.append((pub_date, question_id, State.OPEN))
+        # A question may be both opened and closed by the same run.
+        if end_date is not None and end_date <= until:
+            events.append((end_date, question_id, State.CLOSED))
+    heapq.heapify(events)
+    return events
+
+
+def next_event_time():
+    """Return the time of the next transition, or None if there is none."""
+    State = Question.State
+    with primary():
+        next_open = (Question.objects.filter(state=State.SCHEDULED)
+                     .order_by('pub_date')
+                     .values_list('pub_date', flat=True).first())
+        next_close = (Question.objects.filter(state=State.OPEN,
+                                              end_date__isnull=False)
+                      .order_by('end_date')
+                      .values_list('end_date', flat=True).first())
+    times = [when for when in (next_open, next_close) if when is not None]
+    return min(times, default=None)
+
+
+def open_question(question_id):
+    """Open a scheduled question. Return True if it was opened."""
+    opened = Question.objects.filter(
+        pk=question_id, state=Question.State.SCHEDULED
+    ).update(state=Question.State.OPEN)
+    if opened:
+        logger.info(f"Opened question_id {question_id}")
+        question_opened.send(sender=Question, question_id=question_id)
+    return bool(opened)
+
+
+def close_question(question_id):
+    """
+    Close a question and freeze its final results.
+    :param question_id: The ID of the question.
+    :return: True if the question was closed.
+    """
+    # Freeze the counts of the primary, not of a lagging replica.
+    with primary(), transaction.atomic():
+        closed = Question.objects.filter(
+            pk=question_id
+        ).exclude(state=Question.State.CLOSED).update(
+            state=Question.State.CLOSED)
+        if closed:
+            choices = (Choice.objects.filter(question_id=question_id)
+                       .annotate(total=Count('vote')))
+            for choice in choices:
+                choice.final_votes = choice.total
+            Choice.objects.bulk_update(choices, ['final_votes'])
+    if closed:
+        logger.info(f"Closed question_id {question_id}")
+        question_closed.send(sender=Question, question_id=question_id)
+    return bool(closed)
+
+
+@receiver(pre_save, sender=Question)
+def set_loaded_state(sender, instance, raw, **kwargs):
+    """
+    Give questions loaded from fixtures the state matching their dates.
+
+    loaddata saves raw, bypassing Question.save(), so without this every
+    loaded question would stay scheduled until the scheduler next runs.
+    """
+    if raw:
+        instance.state = instance.state_at(timezone.now())
+
+
+TRANSITIONS = {
+    Question.State.OPEN: open_question,
+    Question.State.CLOSED: close_question,
+}
+
+
+def run_due_transitions(now=None):
+    """
+    Fire every transition that is due, in time order.
+    :param now: The current time, defaults to timezone.now().
+    :return: The number of transitions fired.
+    """
+    events = upcoming_events(now or timezone.now())
+    fired = 0
+    while events:
+        _, question_id, state = heapq.heappop(events)
+        fired += TRANSITIONS[state](question_id)
+    return fired
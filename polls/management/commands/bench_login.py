@@ -0,0 +1,46 @@
+"""Measure password checks per second per core for each hashing profile."""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = "Measure logins per second per core for each password hashing " \
+           "profile in PASSWORD_HASHER_PROFILES."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profiles', nargs='*',
+            help="Profiles to measure (default: all of them).")
+        parser.add_argument(
+            '--seconds', type=float, default=3.0,
+            help="Seconds to spend on each profile (default: 3).")
+
+    def handle(self, *args, **options):
+        profiles = (options['profiles']
+                    or list(settings.PASSWORD_HASHER_PROFILES))
+        for profile in profiles:
+            hasher = import_string(
+                settings.PASSWORD_HASHER_PROFILES[profile][0])()
+            try:
+                rate = self.checks_per_second(hasher, options['seconds'])
+            except ValueError as ex:
+                # Raised when the hasher's library isn't installed.
+                self.stdout.write(f"{profile:>14}: skipped ({ex})")
+                continue
+            self.stdout.write(f"{profile:>14}: {rate:8.1f} logins/s/core "
+                              f"({1000 / rate:.1f} ms each, "
+                              f"{hasher.algorithm})")
+
+    @staticmethod
+    def checks_per_second(hasher, seconds):
+        """Return how many password checks one thread does per second."""
+        encoded = hasher.encode('correct horse battery', hasher.salt())
+        checks = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds or not checks:
+            hasher.verify('correct horse battery', encoded)
+            checks += 1
+        return checks / (time.perf_counter() - started)
@@ -0,0 +1,128 @@
+"""Measure how long a fresh server process takes to answer a request."""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def slowest_imports(importtime_output, count):
+    """
+    Return the slowest imports from ``python -X importtime`` output.
+    :param importtime_output: The stderr of the profiled interpreter.
+    :param count: How many imports to return.
+    :return: A list of (cumulative microseconds, module) tuples.
+    """
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        imports.append((int(fields[1]), fields[2].strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def free_port():
+    """Return a TCP port nobody is listening on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port):
+    """
+    Return the command starting a server on the given port.
+    :param server: 'gunicorn' for the deployed server, as configured in
+    gunicorn.conf.py, or 'runserver' for Django's development server.
+    :param port: The port to listen on.
+    """
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', 'mysite.wsgi:application',
+                '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}']
+    return [sys.executable, 'manage.py', 'runserver', '--noreload',
+            '--skip-checks', f'127.0.0.1:{port}']
+
+
+class Command(BaseCommand):
+    help = "Measure time-to-first-request of a fresh server process, and " \
+           "optionally profile the imports done at startup."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help="How many servers to start (default: 5).")
+        parser.add_argument(
+            '--path', default='/polls/',
+            help="The URL path to request (default: /polls/).")
+        parser.add_argument(
+            '--timeout', type=float, default=60.0,
+            help="Seconds to wait for each server (default: 60).")
+        parser.add_argument(
+            '--server', choices=['gunicorn', 'runserver'],
+            default='gunicorn',
+            help="The server to start: gunicorn with gunicorn.conf.py, as "
+                 "deployed, or runserver (default: gunicorn).")
+        parser.add_argument(
+            '--imports', type=int, default=0, metavar='N',
+            help="Also list the N slowest imports of mysite.wsgi.")
+
+    def handle(self, *args, **options):
+        timings = [self.time_to_first_request(options['server'],
+                                              options['path'],
+                                              options['timeout'])
+                   for _ in range(options['runs'])]
+        self.stdout.write(
+            f"{options['server']} time-to-first-request over "
+            f"{len(timings)} run(s): "
+            f"min {min(timings):.3f}s, "
+            f"median {statistics.median(timings):.3f}s, "
+            f"max {max(timings):.3f}s")
+        if options['imports']:
+            self.profile_imports(options['imports'])
+
+    def time_to_first_request(self, kind, path, timeout):
+        """Start a server and return the seconds until it answers."""
+        port = free_port()
+        url = f'http://127.0.0.1:{port}{path}'
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            server_command(kind, port),
+            cwd=settings.BASE_DIR, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise CommandError("The server exited before answering")
+                try:
+                    with urllib.request.urlopen(url, timeout=timeout):
+                        return time.perf_counter() - started
+                except urllib.error.HTTPError:
+                    # Any HTTP answer means the server is up.
+                    return time.perf_counter() - started
+                except OSError:
+                    time.sleep(0.01)
+            raise CommandError(f"No answer from {url} in {timeout}s")
+        finally:
+            server.terminate()
+            server.wait()
+
+    def profile_imports(self, count):
+        """Print the slowest imports done when loading the WSGI app."""
+        profile = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import mysite.wsgi'],
+            cwd=settings.BASE_DIR, env=os.environ.copy(),
+            capture_output=True, text=True)
+        if profile.returncode:
+            raise CommandError(profile.stderr.splitlines()[-1])
+        self.stdout.write("slowest imports of mysite.wsgi:")
+        for microseconds, module in slowest_imports(profile.stderr, count):
+            self.stdout.write(f"{microseconds / 1000:10.1f} ms  {module}")
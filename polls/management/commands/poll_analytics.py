@@ -0,0 +1,51 @@
+"""Print cross-question analytics of the polls."""
+
+from django.core.management.base import BaseCommand, CommandError
+from polls import analytics
+
+
+class Command(BaseCommand):
+    help = "Print turnout, a cross-tab of two questions, or the voter " \
+           "overlap between questions."
+
+    def add_arguments(self, parser):
+        report = parser.add_mutually_exclusive_group(required=True)
+        report.add_argument(
+            '--turnout', action='store_true',
+            help="Voters and participation rate of every question.")
+        report.add_argument(
+            '--crosstab', type=int, nargs=2, metavar=('A', 'B'),
+            help="How the voters of question A voted on question B.")
+        report.add_argument(
+            '--overlap', type=int, nargs='+', metavar='QUESTION',
+            help="Voters shared by each pair of the given questions.")
+
+    def handle(self, *args, **options):
+        if options['turnout']:
+            votes = analytics.load_votes()
+            for question_id, (voters, rate) in sorted(
+                    analytics.turnout(votes).items()):
+                self.stdout.write(f"question {question_id}: "
+                                  f"{voters} voter(s), {rate:.1%}")
+        elif options['crosstab']:
+            question_a, question_b = options['crosstab']
+            votes = analytics.load_votes([question_a, question_b])
+            choices_a, choices_b, table = analytics.crosstab(
+                votes, question_a, question_b)
+            if not len(choices_a) or not len(choices_b):
+                raise CommandError("Both questions need choices")
+            self.write_table(choices_a, choices_b, table)
+        else:
+            # A repeated question would share a column with its twin.
+            question_ids = list(dict.fromkeys(options['overlap']))
+            votes = analytics.load_votes(question_ids)
+            self.write_table(question_ids, question_ids,
+                             analytics.overlap(votes, question_ids))
+
+    def write_table(self, row_ids, column_ids, table):
+        """Write a table with its row and column IDs as headers."""
+        self.stdout.write("".join(f"{column_id:>10}"
+                                  for column_id in [""] + list(column_ids)))
+        for row_id, row in zip(row_ids, table):
+            self.stdout.write("".join(f"{value:>10}"
+                                      for value in [row_id] + list(row)))
@@ -0,0 +1,12 @@
+"""Recompute the vote history buckets from the vote event log."""
+
+from django.core.management.base import BaseCommand
+from polls.rollup import rebuild_buckets
+
+
+class Command(BaseCommand):
+    help = "Recompute the vote history buckets from the vote event log. " \
+           "Votes wait until the rebuild is done."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Wrote {rebuild_buckets()} bucket(s)")
@@ -0,0 +1,32 @@
+"""Rebuild vote tallies from the vote event log."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from polls.audit import tallies_as_of
+
+
+class Command(BaseCommand):
+    help = "Rebuild vote tallies from the vote event log as of a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--as-of', dest='as_of',
+            help="Replay events up to this ISO 8601 time (default: now).")
+        parser.add_argument(
+            '--question', type=int,
+            help="Only replay the votes of this question ID.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_datetime(options['as_of'])
+            if as_of is None:
+                raise CommandError(f"Invalid time '{options['as_of']}'")
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+        tallies = tallies_as_of(as_of, options['question'])
+        for question_id in sorted(tallies):
+            for choice_id, votes in sorted(tallies[question_id].items()):
+                self.stdout.write(f"question {question_id} "
+                                  f"choice {choice_id}: {votes}")
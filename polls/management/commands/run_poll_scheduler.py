@@ -0,0 +1,54 @@
+"""Open and close polls as their pub_date and end_date pass."""
+
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from polls.lifecycle import next_event_time, run_due_transitions
+
+
+logger = logging.getLogger("polls")
+
+
+class Command(BaseCommand):
+    help = "Open and close polls as their pub_date and end_date pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Fire the transitions that are due and exit.")
+        parser.add_argument(
+            '--interval', type=float, default=30.0,
+            help="Most seconds to sleep between checks, so new or edited "
+                 "questions are picked up (default: 30).")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self.fire_due_transitions()
+            return
+        while True:
+            try:
+                self.fire_due_transitions()
+                wait = self.seconds_to_next_event(options['interval'])
+            except Exception as ex:
+                # Keep running: a database hiccup must not leave polls
+                # open past their end date.
+                logger.exception("Poll scheduler failed, retrying %s", ex)
+                close_old_connections()
+                wait = options['interval']
+            time.sleep(wait)
+
+    def fire_due_transitions(self):
+        fired = run_due_transitions()
+        if fired:
+            self.stdout.write(f"Fired {fired} poll transition(s)")
+
+    @staticmethod
+    def seconds_to_next_event(interval):
+        """Return how long to sleep before the next transition is due."""
+        next_event = next_event_time()
+        if next_event is None:
+            return interval
+        wait = (next_event - timezone.now()).total_seconds()
+        return min(max(wait, 0.0), interval)
@@ -0,0 +1,22 @@
+"""Precompute the cached pages of the hottest polls."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from polls.cache import warm_polls
+
+
+class Command(BaseCommand):
+    help = "Precompute the index page, choices and results of the most " \
+           "recent or open polls."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=settings.WARM_POLLS_COUNT,
+            help="How many questions to warm (default: WARM_POLLS_COUNT).")
+
+    def handle(self, *args, **options):
+        if not settings.CACHE_SHARED:
+            raise CommandError("Nothing to warm: the cache is not shared "
+                               "with the server processes (CACHE_SHARED)")
+        question_ids = warm_polls(options['count'])
+        self.stdout.write(f"Warmed {len(question_ids)} question(s)")
@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 20:00
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def set_initial_state(apps, schema_editor):
+    Question = apps.get_model('polls', 'Question')
+    # Stay on the database being migrated, whatever the router says.
+    questions = Question.objects.using(schema_editor.connection.alias)
+    now = timezone.now()
+    questions.filter(end_date__lt=now).update(state='closed')
+    questions.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=now),
+        pub_date__lte=now).update(state='open')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_remove_choice_votes_vote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='final_votes',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='state',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('open', 'Open'), ('closed', 'Closed')], db_index=True, default='scheduled', max_length=10),
+        ),
+        migrations.RunPython(set_initial_state, migrations.RunPython.noop),
+    ]
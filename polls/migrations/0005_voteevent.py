@@ -0,0 +1,45 @@
+# Generated by Django 5.1 on 2026-10-19 20:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_events(apps, schema_editor):
+    """Record the votes cast so far so replays start from them."""
+    Vote = apps.get_model('polls', 'Vote')
+    VoteEvent = apps.get_model('polls', 'VoteEvent')
+    # Stay on the database being migrated, whatever the router says.
+    db = schema_editor.connection.alias
+    votes = Vote.objects.using(db).values_list(
+        'user_id', 'choice__question_id', 'choice_id')
+    VoteEvent.objects.using(db).bulk_create(
+        (VoteEvent(user_id=user_id, question_id=question_id,
+                   new_choice_id=choice_id)
+         for user_id, question_id, choice_id in votes.iterator()),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_question_state_choice_final_votes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ts', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('ip', models.GenericIPAddressField(null=True)),
+                ('new_choice', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='polls.choice')),
+                ('old_choice', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='polls.choice')),
+                ('question', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='polls.question')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(seed_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-19 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_voteevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField()),
+                ('start', models.DateTimeField()),
+                ('delta', models.IntegerField(default=0)),
+                ('choice', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='polls.choice')),
+                ('question', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='polls.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'resolution', 'start'], name='polls_voteb_questio_285fae_idx')],
+                'constraints': [models.UniqueConstraint(fields=('choice', 'resolution', 'start'), name='unique_vote_bucket')],
+            },
+        ),
+    ]
@@ -12,27 +12,48 @@ class Question(models.Model):
         question_text (CharField): The text of question.
         pub_date (DateTimeField): The datetime when question published.
         end_date (DateTimeField): The ending date for voting.
+        state (CharField): The lifecycle state, kept up to date by the
+        poll scheduler as pub_date and end_date pass.
     """
+
+    class State(models.TextChoices):
+        SCHEDULED = 'scheduled'
+        OPEN = 'open'
+        CLOSED = 'closed'
+
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField('date published', default=timezone.now)
     end_date = models.DateTimeField('ending date for voting', null=True)
+    state = models.CharField(max_length=10, choices=State.choices,
+                             default=State.SCHEDULED, db_index=True)
 
     def __str__(self):
         return self.question_text
 
+    def save(self, *args, **kwargs):
+        self.state = self.state_at(timezone.now())
+        super().save(*args, **kwargs)
+
+    def state_at(self, when):
+        """Return the state the question is in at the given time."""
+        if when < self.pub_date:
+            return self.State.SCHEDULED
+        if self.end_date is not None and when > self.end_date:
+            return self.State.CLOSED
+        return self.State.OPEN
+
     def was_published_recently(self):
         now = timezone.now()
         return now - datetime.timedelta(days=1) <= self.pub_date <= now
 
     def is_published(self):
-        current_time = timezone.localtime(timezone.now())
-        return current_time >= self.pub_date
+        return self.state != self.State.SCHEDULED
 
     def can_vote(self):
-        current_time = timezone.localtime(timezone.now())
-        if self.end_date is None:
-            return current_time >= self.pub_date
-        return self.pub_date <= current_time <= self.end_date
+        # Also check end_date so a stopped scheduler can't extend a poll.
+        return (self.state == self.State.OPEN
+                and (self.end_date is None
+                     or timezone.now() <= self.end_date))
 
 
 class Choice(models.Model):
@@ -42,14 +63,18 @@ class Choice(models.Model):
     Attributes:
         question (ForeignKey): The question that choice belong to.
         choice_text (CharField): The text of choices.
-        votes (IntegerField): The number of total votes.
+        final_votes (IntegerField): The votes frozen when the poll closed.
     """
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
+    final_votes = models.IntegerField(null=True, blank=True)
 
     @property
     def votes(self):
         """returns the votes of the choice"""
+        if (self.final_votes is not None
+                and self.question.state == Question.State.CLOSED):
+            return self.final_votes
         return self.vote_set.all().count()
 
     def __str__(self):
@@ -60,3 +85,62 @@ class Vote(models.Model):
     """A vote by a user for a choice in a poll"""
     choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+
+class VoteEvent(models.Model):
+    """
+    An append-only record of a user casting or changing a vote.
+
+    Attributes:
+        user (ForeignKey): The user who voted.
+        question (ForeignKey): The question voted on.
+        old_choice (ForeignKey): The previous choice, None for a first vote.
+        new_choice (ForeignKey): The choice voted for.
+        ts (DateTimeField): When the vote was cast.
+        ip (GenericIPAddressField): The address the vote came from.
+    """
+    # No database constraints so the log survives deleted polls and users.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING,
+                             db_constraint=False, db_index=False,
+                             related_name='+')
+    question = models.ForeignKey(Question, on_delete=models.DO_NOTHING,
+                                 db_constraint=False, related_name='+')
+    old_choice = models.ForeignKey(Choice, on_delete=models.DO_NOTHING,
+                                   db_constraint=False, db_index=False,
+                                   null=True, related_name='+')
+    new_choice = models.ForeignKey(Choice, on_delete=models.DO_NOTHING,
+                                   db_constraint=False, db_index=False,
+                                   related_name='+')
+    ts = models.DateTimeField(default=timezone.now, db_index=True)
+    ip = models.GenericIPAddressField(null=True)
+
+
+class VoteBucket(models.Model):
+    """
+    The net change in votes for a choice over one fixed time bucket.
+
+    Attributes:
+        question (ForeignKey): The question of the choice.
+        choice (ForeignKey): The choice voted for or away from.
+        resolution (PositiveIntegerField): The bucket length in seconds.
+        start (DateTimeField): When the bucket starts.
+        delta (IntegerField): Votes gained minus votes lost in the bucket.
+    """
+    # Both lookups are covered by the indexes in Meta.
+    question = models.ForeignKey(Question, on_delete=models.CASCADE,
+                                 db_index=False)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE,
+                               db_index=False)
+    resolution = models.PositiveIntegerField()
+    start = models.DateTimeField()
+    delta = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['choice', 'resolution', 'start'],
+                name='unique_vote_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'resolution', 'start']),
+        ]
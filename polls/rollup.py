@@ -0,0 +1,153 @@
+"""
+Time-bucketed vote history for the polls application.
+
+Each batch of vote events is folded into per-choice VoteBucket rows at
+every resolution in ``RESOLUTIONS``. A bucket holds the net change of a
+choice's votes, so a poll's history is the running sum of a few hundred
+rows rather than a scan of every vote.
+"""
+
+import datetime
+from collections import Counter, defaultdict
+from django.db import connections, router, transaction
+from .models import Choice, VoteBucket, VoteEvent
+from .routers import primary
+
+
+RESOLUTIONS = {
+    'minute': 60,
+    'hour': 60 * 60,
+}
+
+REBUILD_CHUNK_SIZE = 10000
+# Buckets per upsert statement, well under SQLite's bound parameter limit.
+UPSERT_BATCH_SIZE = 100
+
+
+def bucket_start(ts, resolution):
+    """Return the start of the bucket of the given length holding ts."""
+    seconds = int(ts.timestamp()) // resolution * resolution
+    return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc)
+
+
+def bucket_deltas(events):
+    """
+    Fold vote events into bucket deltas.
+    :param events: Iterable of (question_id, old_choice_id, new_choice_id,
+    ts) tuples.
+    :return: A Counter of (question_id, choice_id, resolution, start) to
+    the net change in votes.
+    """
+    deltas = Counter()
+    for question_id, old_choice_id, new_choice_id, ts in events:
+        for resolution in RESOLUTIONS.values():
+            start = bucket_start(ts, resolution)
+            deltas[question_id, new_choice_id, resolution, start] += 1
+            if old_choice_id is not None:
+                deltas[question_id, old_choice_id, resolution, start] -= 1
+    return deltas
+
+
+def apply_events(events):
+    """
+    Add a batch of vote events to the stored buckets with one upsert.
+
+    Call it in the transaction writing the events, so the events and
+    their buckets are saved together. The buckets are written in key
+    order, so two batches touching the same buckets lock their rows in
+    the same order and can't deadlock.
+    """
+    rows = sorted((choice_id, resolution, start, question_id, delta)
+                  for (question_id, choice_id, resolution, start), delta
+                  in bucket_deltas(events).items() if delta)
+    if not rows:
+        return
+    connection = connections[router.db_for_write(VoteBucket)]
+    quote = connection.ops.quote_name
+    table = quote(VoteBucket._meta.db_table)
+    start_field = VoteBucket._meta.get_field('start')
+    # bulk_create(update_conflicts=True) can only overwrite the delta,
+    # not add to it.
+    sql = (f"INSERT INTO {table} ({quote('question_id')}, "
+           f"{quote('choice_id')}, {quote('resolution')}, {quote('start')}, "
+           f"{quote('delta')}) VALUES {{values}} "
+           f"ON CONFLICT ({quote('choice_id')}, {quote('resolution')}, "
+           f"{quote('start')}) DO UPDATE SET "
+           f"{quote('delta')} = {table}.{quote('delta')} + "
+           f"EXCLUDED.{quote('delta')}")
+    with connection.cursor() as cursor:
+        for first in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[first:first + UPSERT_BATCH_SIZE]
+            params = []
+            for choice_id, resolution, start, question_id, delta in batch:
+                params += [question_id, choice_id, resolution,
+                           start_field.get_db_prep_save(start, connection),
+                           delta]
+            cursor.execute(
+                sql.format(values=', '.join(['(%s, %s, %s, %s, %s)']
+                                            * len(batch))),
+                params)
+
+
+def rebuild_buckets():
+    """
+    Recompute every bucket from the vote event log.
+
+    The bucket table is locked for writes before the events are read, so
+    a vote cast meanwhile waits and then adds to the rebuilt buckets
+    instead of being lost. Voting stalls until the rebuild commits.
+    :return: The number of buckets written.
+    """
+    connection = connections[router.db_for_write(VoteBucket)]
+    with primary(), transaction.atomic(using=connection.alias):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"LOCK TABLE "
+                    f"{connection.ops.quote_name(VoteBucket._meta.db_table)} "
+                    f"IN EXCLUSIVE MODE")
+        # Elsewhere, e.g. SQLite, the delete takes the write lock.
+        VoteBucket.objects.all().delete()
+        events = VoteEvent.objects.order_by('id').values_list(
+            'question_id', 'old_choice_id', 'new_choice_id', 'ts')
+        deltas = bucket_deltas(events.iterator(chunk_size=REBUILD_CHUNK_SIZE))
+        existing = set(Choice.objects.values_list('id', flat=True))
+        buckets = [VoteBucket(question_id=question_id, choice_id=choice_id,
+                              resolution=resolution, start=start,
+                              delta=delta)
+                   for (question_id, choice_id, resolution, start), delta
+                   in deltas.items() if delta and choice_id in existing]
+        VoteBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+def history(question, resolution):
+    """
+    Return the cumulative votes of each choice of a question over time.
+    :param question: The question.
+    :param resolution: The bucket length in seconds.
+    :return: A dict with the bucket start times and, per choice, the
+    total votes at the end of each bucket.
+    """
+    rows = (VoteBucket.objects
+            .filter(question=question, resolution=resolution)
+            .order_by('start')
+            .values_list('start', 'choice_id', 'delta'))
+    starts = []
+    deltas = defaultdict(dict)
+    for start, choice_id, delta in rows:
+        if not starts or starts[-1] != start:
+            starts.append(start)
+        deltas[choice_id][start] = delta
+    choices = []
+    for choice_id, choice_text in (question.choice_set.order_by('id')
+                                   .values_list('id', 'choice_text')):
+        total = 0
+        counts = []
+        for start in starts:
+            total += deltas[choice_id].get(start, 0)
+            counts.append(total)
+        choices.append({'id': choice_id, 'text': choice_text,
+                        'counts': counts})
+    return {'buckets': [start.isoformat() for start in starts],
+            'choices': choices}
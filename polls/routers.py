@@ -0,0 +1,91 @@
+"""
+Database routing for the polls application.
+
+Reads of polls data are spread over the read replicas listed in
+``settings.READ_REPLICAS`` while every write, and any read made while
+pinned to the primary, goes to the default database.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+PRIMARY_PIN_SESSION_KEY = 'polls_primary_pin_until'
+
+_pinned = ContextVar('polls_pinned_to_primary', default=False)
+
+
+@contextmanager
+def primary():
+    """Route every polls query made inside the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def pin_primary(request):
+    """
+    Keep the requesting user on the primary for a short window.
+
+    Called after a write so the user's next pages don't read from a
+    replica that hasn't caught up with their change yet.
+    :param request: The Http request object.
+    """
+    # Without replicas every read is already on the primary.
+    if not getattr(settings, 'READ_REPLICAS', []):
+        return
+    window = getattr(settings, 'PRIMARY_STICKY_SECONDS', 0)
+    if window > 0:
+        request.session[PRIMARY_PIN_SESSION_KEY] = time.time() + window
+
+
+def is_pinned(request):
+    """Return True if the request's session is inside a sticky window."""
+    pin_until = request.session.get(PRIMARY_PIN_SESSION_KEY)
+    return pin_until is not None and time.time() < pin_until
+
+
+class PrimaryPinMiddleware:
+    """Send all reads of a request to the primary during a sticky window."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_pinned(request):
+            with primary():
+                return self.get_response(request)
+        return self.get_response(request)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route polls reads to a random read replica and all writes to primary.
+
+    Models of other apps (auth, sessions, ...) are left on the primary so
+    a fresh login is never lost to replication lag.
+    """
+    app_label = 'polls'
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'READ_REPLICAS', [])
+        if (model._meta.app_label != self.app_label or not replicas
+                or _pinned.get()):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
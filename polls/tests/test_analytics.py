@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from polls.models import Choice, Question, Vote
+from polls import analytics
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class AnalyticsTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(username=f"voter{n}") for n in range(4)]
+        cls.question_a = create_question("Question A", choices=["X", "Y"])
+        cls.question_b = create_question("Question B", choices=["P", "Q"])
+        cls.x, cls.y = cls.question_a.choice_set.order_by('id')
+        cls.p, cls.q = cls.question_b.choice_set.order_by('id')
+        # voter0: X, P   voter1: X, Q   voter2: Y, P   voter3: X only
+        for user, choices in zip(cls.users, [(cls.x, cls.p), (cls.x, cls.q),
+                                             (cls.y, cls.p), (cls.x,)]):
+            for choice in choices:
+                Vote.objects.create(user=user, choice=choice)
+
+    def test_load_votes(self):
+        """Every vote becomes one row of the arrays."""
+        votes = analytics.load_votes()
+        self.assertEqual(len(votes), 7)
+        self.assertEqual(sorted(votes.questions.tolist()),
+                         [self.question_a.id] * 4 + [self.question_b.id] * 3)
+
+    def test_turnout(self):
+        """Turnout counts voters and divides by the eligible users."""
+        result = analytics.turnout(analytics.load_votes(), total_users=4)
+        self.assertEqual(result, {self.question_a.id: (4, 1.0),
+                                  self.question_b.id: (3, 0.75)})
+
+    def test_crosstab(self):
+        """The cross-tab counts voters by their pair of choices."""
+        rows, columns, table = analytics.crosstab(
+            analytics.load_votes(), self.question_a.id, self.question_b.id)
+        self.assertEqual(rows.tolist(), [self.x.id, self.y.id])
+        self.assertEqual(columns.tolist(), [self.p.id, self.q.id])
+        self.assertEqual(table.tolist(), [[1, 1], [1, 0]])
+
+    def test_overlap(self):
+        """The overlap counts voters shared by each pair of questions."""
+        question_ids = [self.question_b.id, self.question_a.id]
+        table = analytics.overlap(analytics.load_votes(question_ids),
+                                  question_ids)
+        self.assertEqual(table.tolist(), [[3, 3], [3, 4]])
+
+    def test_command(self):
+        """The management command prints the turnout of each question."""
+        out = StringIO()
+        call_command('poll_analytics', '--turnout', stdout=out)
+        self.assertIn(f"question {self.question_b.id}: 3 voter(s)",
+                      out.getvalue())
+
+    def test_endpoint_is_staff_only(self):
+        """Only staff can read the analytics endpoint."""
+        self.client.login(username="voter0", password="Voter!123")
+        response = self.client.get(reverse('polls:analytics'))
+        self.assertEqual(response.status_code, 302)
+        create_user(username="analyst", is_staff=True)
+        self.client.login(username="analyst", password="Voter!123")
+        response = self.client.get(reverse('polls:analytics'),
+                                   {'report': 'crosstab',
+                                    'a': self.question_a.id,
+                                    'b': self.question_b.id})
+        self.assertEqual(response.json()['counts'], [[1, 1], [1, 0]])
+
+    def test_overlap_ignores_repeated_questions(self):
+        """A question given twice is compared once."""
+        create_user(username="analyst", is_staff=True)
+        self.client.login(username="analyst", password="Voter!123")
+        response = self.client.get(reverse('polls:analytics'),
+                                   {'report': 'overlap',
+                                    'question': [self.question_b.id,
+                                                 self.question_b.id,
+                                                 self.question_a.id]})
+        self.assertEqual(response.json()['questions'],
+                         [self.question_b.id, self.question_a.id])
+        self.assertEqual(response.json()['counts'], [[3, 3], [3, 4]])
+
+    def test_endpoint_rejects_bad_parameters(self):
+        """Missing or invalid parameters are a bad request."""
+        create_user(username="analyst", is_staff=True)
+        self.client.login(username="analyst", password="Voter!123")
+        for params in ({'report': 'crosstab', 'a': self.question_a.id},
+                       {'report': 'overlap', 'question': 'first'},
+                       {'report': 'unknown'}):
+            response = self.client.get(reverse('polls:analytics'), params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_wide_question_ids(self):
+        """A question ID past the int32 range widens the arrays."""
+        question = Question.objects.create(pk=2 ** 31 + 5,
+                                           question_text="Wide poll")
+        choice = Choice.objects.create(question=question, choice_text="Yes")
+        Vote.objects.create(user=create_user(username="wide"), choice=choice)
+        votes = analytics.load_votes([question.id])
+        self.assertEqual(votes.questions.tolist(), [question.id])
@@ -0,0 +1,66 @@
+import datetime
+from unittest import mock
+
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Vote, VoteEvent
+from polls.audit import tallies_as_of
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class VoteAuditTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="voter")
+        cls.question = create_question("Audited poll", choices=["One", "Two"])
+        cls.choice1, cls.choice2 = cls.question.choice_set.order_by('id')
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def vote(self, choice):
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': choice.id},
+                         REMOTE_ADDR='10.0.0.1')
+
+    def test_event_written_with_vote(self):
+        """The event is written as soon as the vote is."""
+        self.vote(self.choice1)
+        event = VoteEvent.objects.get()
+        self.assertEqual((event.user_id, event.question_id,
+                          event.old_choice_id, event.new_choice_id, event.ip),
+                         (self.user.id, self.question.id, None,
+                          self.choice1.id, '10.0.0.1'))
+
+    def test_vote_rolled_back_without_event(self):
+        """A vote whose event can't be written is not saved either."""
+        with mock.patch('polls.audit.apply_events',
+                        side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.vote(self.choice1)
+        self.assertFalse(Vote.objects.exists())
+        self.assertFalse(VoteEvent.objects.exists())
+
+    def test_changed_vote_keeps_history(self):
+        """Changing a vote appends an event with the old choice."""
+        self.vote(self.choice1)
+        self.vote(self.choice2)
+        self.assertEqual(
+            list(VoteEvent.objects.order_by('id').values_list(
+                'old_choice_id', 'new_choice_id')),
+            [(None, self.choice1.id), (self.choice1.id, self.choice2.id)])
+
+    def test_replay_as_of(self):
+        """Replaying rebuilds the tallies at any earlier moment."""
+        self.vote(self.choice1)
+        VoteEvent.objects.update(ts=timezone.now()
+                                 - datetime.timedelta(hours=1))
+        self.vote(self.choice2)
+        earlier = timezone.now() - datetime.timedelta(minutes=30)
+        self.assertEqual(tallies_as_of(earlier, self.question.id),
+                         {self.question.id: {self.choice1.id: 1}})
+        self.assertEqual(tallies_as_of(question_id=self.question.id),
+                         {self.question.id: {self.choice2.id: 1}})
@@ -1,32 +1,22 @@
-import django.test
 from django.urls import reverse
-from django.contrib.auth.models import User
-from polls.models import Question, Choice
+from polls.tests.utils import PollsTestCase, create_question, create_user
 from mysite import settings
 
 
-class UserAuthTest(django.test.TestCase):
+class UserAuthTest(PollsTestCase):
 
-    def setUp(self):
-        """
-        superclass setUp creates a Client object and initializes test database
-        """
-        super().setUp()
-        self.username = "testuser"
-        self.password = "FatChance!"
-        self.user1 = User.objects.create_user(
-            username=self.username,
-            password=self.password,
-            email="testuser@nowhere.com"
-        )
-        self.user1.first_name = "Tester"
-        self.user1.save()
-        q = Question.objects.create(question_text="First Poll Question")
-        q.save()
-        for n in range(1, 4):
-            choice = Choice(choice_text=f"Choice {n}", question=q)
-            choice.save()
-        self.question = q
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user and poll shared by every test."""
+        cls.username = "testuser"
+        cls.password = "FatChance!"
+        cls.user1 = create_user(username=cls.username,
+                                password=cls.password,
+                                email="testuser@nowhere.com",
+                                first_name="Tester")
+        cls.question = create_question(
+            "First Poll Question",
+            choices=[f"Choice {n}" for n in range(1, 4)])
 
     def test_logout(self):
         """
@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.models import Vote
+from polls.cache import get_user_votes
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class BallotTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="voter")
+        cls.questions = [create_question(f"Survey question {n}",
+                                          choices=["Yes", "No"])
+                         for n in range(5)]
+        cls.closed = create_question("Closed question", days=-10,
+                                     end_days=-5, choices=["Yes", "No"])
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def ballot_data(self, questions, index=0):
+        return {f'question_{question.id}':
+                question.choice_set.order_by('id')[index].id
+                for question in questions}
+
+    def submit(self, data):
+        return self.client.post(reverse('polls:ballot'), data)
+
+    def test_form_lists_open_questions(self):
+        """The ballot form shows every open question and no closed one."""
+        response = self.client.get(reverse('polls:ballot'))
+        self.assertContains(response, "Survey question 4")
+        self.assertNotContains(response, "Closed question")
+
+    def test_votes_on_every_question(self):
+        """One ballot records a vote on each question."""
+        response = self.submit(self.ballot_data(self.questions))
+        self.assertContains(response, "Your ballot with 5 vote(s) was recorded")
+        self.assertEqual(Vote.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(len(get_user_votes(self.user)), 5)
+
+    def test_changes_existing_votes(self):
+        """A second ballot changes the votes instead of adding more."""
+        self.submit(self.ballot_data(self.questions))
+        self.submit(self.ballot_data(self.questions, index=1))
+        votes = Vote.objects.filter(user=self.user)
+        self.assertEqual(votes.count(), 5)
+        self.assertEqual({vote.choice.choice_text for vote in votes}, {"No"})
+
+    def test_queries_do_not_grow_with_questions(self):
+        """A ballot takes as many queries for five questions as for two."""
+        first_ballot = self.ballot_data(self.questions[:2])
+        second_ballot = self.ballot_data(self.questions, index=1)
+        with CaptureQueriesContext(connection) as two:
+            self.submit(first_ballot)
+        with CaptureQueriesContext(connection) as five:
+            self.submit(second_ballot)
+        self.assertEqual(len(five), len(two))
+
+    def test_closed_question_rejects_whole_ballot(self):
+        """No vote is recorded if any question of the ballot is closed."""
+        response = self.submit(self.ballot_data(self.questions
+                                                + [self.closed]))
+        self.assertContains(response, "Voting is not allowed now for "
+                                      "&#x27;Closed question&#x27;")
+        self.assertFalse(Vote.objects.exists())
+
+    def test_choice_of_other_question(self):
+        """A choice given for the wrong question is rejected."""
+        data = {f'question_{self.questions[0].id}':
+                self.questions[1].choice_set.first().id}
+        response = self.submit(data)
+        self.assertContains(response, "Invalid choice")
+        self.assertFalse(Vote.objects.exists())
+
+    def test_empty_ballot(self):
+        """A ballot without choices is rejected."""
+        response = self.submit({})
+        self.assertContains(response, "You didn&#x27;t select a choice")
@@ -0,0 +1,128 @@
+import datetime
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Question
+from polls.cache import get_index, get_or_compute, get_results, warm_polls
+from polls.lifecycle import run_due_transitions
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """Threads missing the same key share one recomputation."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(get_or_compute('polls:test',
+                                                         compute)))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_hit_skips_compute(self):
+        """A cached value is returned without computing."""
+        cache.set('polls:test', 'cached')
+        self.assertEqual(get_or_compute('polls:test', lambda: 'fresh'),
+                         'cached')
+
+
+class PollCacheTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_user(username="voter")
+        cls.question = create_question("Hot poll", choices=["Yes"])
+        cls.choice = cls.question.choice_set.get()
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def test_warm_polls_fills_cache(self):
+        """Warmed questions and the index are served without queries."""
+        self.assertEqual(warm_polls(5), [self.question.id])
+        with self.assertNumQueries(0):
+            get_results(self.question.id)
+
+    def test_vote_refreshes_results(self):
+        """A vote makes the results page show the new count."""
+        self.assertEqual(get_results(self.question.id)[0]['votes'], 0)
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': self.choice.id})
+        response = self.client.get(reverse('polls:results',
+                                           args=(self.question.id,)))
+        self.assertEqual(response.context['results'],
+                         [{'choice_text': "Yes", 'votes': 1}])
+
+    def test_new_question_shown_on_index(self):
+        """Adding a question refreshes the cached index page."""
+        self.client.get(reverse('polls:index'))
+        Question.objects.create(question_text="Brand new poll")
+        response = self.client.get(reverse('polls:index'))
+        self.assertContains(response, "Brand new poll")
+
+    def test_opened_question_is_warmed(self):
+        """A question opened by the scheduler has warm caches."""
+        question = create_question("Later poll", days=1)
+        run_due_transitions(timezone.now() + datetime.timedelta(days=2))
+        with self.assertNumQueries(0):
+            get_results(question.id)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_nothing_cached_without_shared_cache(self):
+        """A process-local cache is neither filled nor warmed."""
+        get_results(self.question.id)
+        with self.assertNumQueries(1):
+            get_results(self.question.id)
+        with self.assertRaises(CommandError):
+            call_command('warm_polls')
+
+
+@override_settings(READ_REPLICAS=['replica1'])
+class ReplicaReadTests(SimpleTestCase):
+    # Read only: the mirrored replica can't see a test's uncommitted rows.
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        cache.clear()
+
+    def assertReadsFrom(self, alias, read):
+        other = 'default' if alias == 'replica1' else 'replica1'
+        with CaptureQueriesContext(connections[alias]) as used, \
+                CaptureQueriesContext(connections[other]) as unused:
+            read()
+        self.assertTrue(used)
+        self.assertFalse(unused)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_uncached_reads_use_replica(self):
+        """Without a shared cache the index and results read a replica."""
+        self.assertReadsFrom('replica1', get_index)
+        self.assertReadsFrom('replica1', lambda: get_results(1))
+
+    def test_cache_fills_read_primary(self):
+        """Values put in the shared cache are read from the primary."""
+        self.assertReadsFrom('default', get_index)
+        self.assertReadsFrom('default', lambda: get_results(1))
@@ -1,21 +1,8 @@
-import datetime
-from django.utils import timezone
-from django.test import TestCase
 from django.urls import reverse
-from polls.models import Question
+from polls.tests.utils import PollsTestCase, create_question
 
 
-def create_question(question_text, days):
-    """
-    Create a question with the given `question_text` and published the
-    given number of `days` offset to now (negative for questions published
-    in the past, positive for questions that have yet to be published).
-    """
-    time = timezone.now() + datetime.timedelta(days=days)
-    return Question.objects.create(question_text=question_text, pub_date=time)
-
-
-class QuestionIndexViewTests(TestCase):
+class QuestionIndexViewTests(PollsTestCase):
     def test_no_questions(self):
         """
         If no questions exist, an appropriate message is displayed.
@@ -49,10 +36,8 @@ class QuestionIndexViewTests(TestCase):
         """
         Test that correct status (Close) is displayed for unpublished question.
         """
-        pub_date = timezone.now() + datetime.timedelta(days=-10)
-        end_date = timezone.now() + datetime.timedelta(days=-5)
-        Question.objects.create(question_text="Published question.",
-                                pub_date=pub_date, end_date=end_date)
+        create_question(question_text="Published question.", days=-10,
+                        end_days=-5)
         response = self.client.get(reverse('polls:index'))
         self.assertContains(response, "Published question")
         self.assertContains(response, '<div class="close-status">Close</div>',
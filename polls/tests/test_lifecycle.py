@@ -0,0 +1,117 @@
+import datetime
+import json
+from unittest import mock
+
+from django.core import serializers
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase
+from django.utils import timezone
+from polls.models import Question, Choice, Vote
+from polls.lifecycle import (question_closed, question_opened,
+                             run_due_transitions, upcoming_events)
+from polls.tests.utils import create_user
+
+
+SCHEDULER = 'polls.management.commands.run_poll_scheduler'
+
+
+class PollLifecycleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.question = Question.objects.create(
+            question_text="Lifecycle poll",
+            pub_date=cls.now + datetime.timedelta(hours=1),
+            end_date=cls.now + datetime.timedelta(hours=2))
+        cls.choice = Choice.objects.create(question=cls.question,
+                                           choice_text="Yes")
+
+    def run_at(self, hours):
+        return run_due_transitions(self.now + datetime.timedelta(hours=hours))
+
+    def test_state_set_on_save(self):
+        """A saved question gets the state matching its dates."""
+        self.assertEqual(self.question.state, Question.State.SCHEDULED)
+        self.assertFalse(self.question.is_published())
+        self.assertFalse(self.question.can_vote())
+
+    def test_events_in_time_order(self):
+        """Due events come off the heap ordered by time."""
+        events = upcoming_events(self.now + datetime.timedelta(hours=3))
+        self.assertEqual(
+            [events[0][2], events[-1][2]],
+            [Question.State.OPEN, Question.State.CLOSED])
+
+    def test_nothing_fires_before_pub_date(self):
+        """No transition fires before the question is due to open."""
+        self.assertEqual(self.run_at(0), 0)
+
+    def test_question_opens_at_pub_date(self):
+        """The question opens once its pub_date has passed."""
+        opened = []
+        question_opened.connect(
+            lambda sender, question_id, **kwargs: opened.append(question_id),
+            weak=False, dispatch_uid='test_opened')
+        self.addCleanup(question_opened.disconnect, dispatch_uid='test_opened')
+        self.assertEqual(self.run_at(1.5), 1)
+        self.question.refresh_from_db()
+        self.assertTrue(self.question.can_vote())
+        self.assertEqual(opened, [self.question.id])
+
+    def test_question_closes_with_final_results(self):
+        """Closing a question freezes its vote counts."""
+        self.run_at(1.5)
+        user = create_user(username="voter")
+        Vote.objects.create(user=user, choice=self.choice)
+        closed = []
+        question_closed.connect(
+            lambda sender, question_id, **kwargs: closed.append(question_id),
+            weak=False, dispatch_uid='test_closed')
+        self.addCleanup(question_closed.disconnect, dispatch_uid='test_closed')
+        self.assertEqual(self.run_at(3), 1)
+        self.question.refresh_from_db()
+        self.choice.refresh_from_db()
+        self.assertFalse(self.question.can_vote())
+        self.assertEqual(self.choice.final_votes, 1)
+        self.assertEqual(closed, [self.question.id])
+
+    def test_transitions_fire_once(self):
+        """A transition that already fired is not fired again."""
+        self.assertEqual(self.run_at(3), 2)
+        self.assertEqual(self.run_at(3), 0)
+
+    def test_voting_stops_at_end_date(self):
+        """A poll past its end date can't be voted on, even if still open."""
+        Question.objects.filter(pk=self.question.pk).update(
+            state=Question.State.OPEN,
+            end_date=timezone.now() - datetime.timedelta(minutes=1))
+        self.question.refresh_from_db()
+        self.assertFalse(self.question.can_vote())
+
+    def test_loaded_question_gets_state(self):
+        """A question loaded from a fixture gets the state of its dates."""
+        fixture = json.dumps([{
+            'model': 'polls.question', 'pk': 1000,
+            'fields': {'question_text': "Loaded poll",
+                       'pub_date': '2024-01-01T00:00:00Z',
+                       'end_date': None}}])
+        for loaded in serializers.deserialize('json', fixture):
+            loaded.save()
+        self.assertEqual(Question.objects.get(pk=1000).state,
+                         Question.State.OPEN)
+
+
+class PollSchedulerTests(TestCase):
+
+    def test_scheduler_survives_errors(self):
+        """A failing run is logged and the scheduler keeps going."""
+        with mock.patch(f'{SCHEDULER}.run_due_transitions',
+                        side_effect=OperationalError), \
+                mock.patch(f'{SCHEDULER}.time.sleep',
+                           side_effect=[None, KeyboardInterrupt]) as sleep, \
+                self.assertLogs('polls', 'ERROR'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('run_poll_scheduler', '--interval', '5')
+        self.assertEqual(sleep.call_args_list, [mock.call(5.0)] * 2)
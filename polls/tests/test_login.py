@@ -0,0 +1,130 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from polls import auth
+from polls.hashers import (TunedArgon2PasswordHasher,
+                           TunedPBKDF2PasswordHasher)
+from polls.tests.utils import PollsTestCase, create_user
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = 1
+
+
+def login(username, password):
+    request = RequestFactory().post('/accounts/login/')
+    return authenticate(request, username=username, password=password)
+
+
+class PooledLoginTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="voter")
+
+    def test_login(self):
+        """Valid credentials authenticate through the login pool."""
+        self.assertEqual(login("voter", "Voter!123"), self.user)
+
+    def test_wrong_password(self):
+        """Wrong credentials or unknown users don't authenticate."""
+        self.assertIsNone(login("voter", "nope"))
+        self.assertIsNone(login("nobody", "nope"))
+
+    def test_outdated_hash_is_upgraded(self):
+        """A hash from an older hasher is replaced on the next login."""
+        with override_settings(PASSWORD_HASHERS=[
+                'polls.tests.test_login.FastPBKDF2PasswordHasher',
+                'django.contrib.auth.hashers.MD5PasswordHasher']):
+            login("voter", "Voter!123")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1$'))
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=1,
+                       LOGIN_HASH_TIMEOUT=0.01)
+    def test_full_pool_asks_to_retry(self):
+        """A login finding every slot taken is asked to try again."""
+        # As if another server process were hashing.
+        cache.add(auth.hash_slot_key(0), True)
+        failed = []
+        user_login_failed.connect(
+            lambda sender, **kwargs: failed.append(sender),
+            weak=False, dispatch_uid='test_failed')
+        self.addCleanup(user_login_failed.disconnect,
+                        dispatch_uid='test_failed')
+        response = self.client.post(reverse('login'),
+                                    {'username': "voter",
+                                     'password': "Voter!123"})
+        self.assertContains(response, "please try again", status_code=503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(failed, [])
+        cache.delete(auth.hash_slot_key(0))
+        self.assertEqual(login("voter", "Voter!123"), self.user)
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=1,
+                       LOGIN_HASH_TIMEOUT=0.01)
+    def test_full_pool_asks_admin_login_to_retry(self):
+        """The admin login finding every slot taken is asked to try again."""
+        cache.add(auth.hash_slot_key(0), True)
+        self.addCleanup(cache.delete, auth.hash_slot_key(0))
+        response = self.client.post(reverse('admin:login'),
+                                    {'username': "voter",
+                                     'password': "Voter!123"})
+        self.assertContains(response, "please try again", status_code=503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_slots_per_host(self):
+        """Hosts sharing a cache each get their own hashing slots."""
+        with mock.patch('socket.gethostname', return_value='web-1'):
+            key = auth.hash_slot_key(0)
+        with mock.patch('socket.gethostname', return_value='web-2'):
+            self.assertNotEqual(auth.hash_slot_key(0), key)
+
+    @override_settings(CACHE_SHARED=False, LOGIN_HASH_WORKERS=1,
+                       LOGIN_HASH_QUEUE=0)
+    def test_slots_per_process_without_shared_cache(self):
+        """Without a shared cache, slots are limited per process."""
+        with auth.hashing_slot():
+            with self.assertRaises(auth.LoginThrottled):
+                login("voter", "Voter!123")
+        self.assertEqual(login("voter", "Voter!123"), self.user)
+
+    def test_benchmark(self):
+        """The benchmark reports a rate for each profile."""
+        out = StringIO()
+        with override_settings(PASSWORD_HASHER_PROFILES={'fast': [
+                'polls.tests.test_login.FastPBKDF2PasswordHasher']}):
+            call_command('bench_login', '--seconds', '0.01', stdout=out)
+        self.assertIn("fast:", out.getvalue())
+
+
+class TunedHasherTests(SimpleTestCase):
+
+    def test_pbkdf2_only_upgrades(self):
+        """Hashes with more iterations are kept, fewer are upgraded."""
+        hasher = TunedPBKDF2PasswordHasher()
+        salt = hasher.salt()
+        self.assertFalse(hasher.must_update(
+            f'pbkdf2_sha256$870000${salt}$hash'))
+        self.assertTrue(hasher.must_update(
+            f'pbkdf2_sha256$100000${salt}$hash'))
+
+    def test_argon2_only_upgrades(self):
+        """Argon2 hashes costlier than the tuned ones are kept."""
+        hasher = TunedArgon2PasswordHasher()
+        encoded = hasher.encode("Voter!123", hasher.salt())
+        self.assertFalse(hasher.must_update(encoded))
+        # Django's default Argon2 parameters.
+        stock = encoded.replace('m=19456,t=2,p=1', 'm=102400,t=2,p=8')
+        self.assertFalse(hasher.must_update(stock))
+        weaker = encoded.replace('m=19456,t=2,p=1', 'm=8192,t=2,p=1')
+        self.assertTrue(hasher.must_update(weaker))
+        self.assertTrue(hasher.must_update(
+            encoded.replace('$argon2id$', '$argon2i$')))
@@ -3,16 +3,7 @@ import datetime
 from django.test import TestCase
 from django.utils import timezone
 from polls.models import Question
-
-
-def create_question(question_text, days):
-    """
-    Create a question with the given `question_text` and published the
-    given number of `days` offset to now (negative for questions published
-    in the past, positive for questions that have yet to be published).
-    """
-    time = timezone.now() + datetime.timedelta(days=days)
-    return Question.objects.create(question_text=question_text, pub_date=time)
+from polls.tests.utils import create_question
 
 
 class QuestionModelTests(TestCase):
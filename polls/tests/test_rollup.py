@@ -0,0 +1,74 @@
+import datetime
+
+from django.urls import reverse
+from polls.models import VoteBucket, VoteEvent
+from polls.rollup import apply_events, bucket_start, rebuild_buckets
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class VoteHistoryTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="voter")
+        cls.question = create_question("Trend poll", choices=["One", "Two"])
+        cls.choice1, cls.choice2 = cls.question.choice_set.order_by('id')
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def vote(self, choice):
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': choice.id})
+
+    def get_history(self, resolution):
+        return self.client.get(
+            reverse('polls:results_history', args=(self.question.id,)),
+            {'resolution': resolution})
+
+    def test_bucket_start(self):
+        """Times are floored to the start of their bucket."""
+        ts = datetime.datetime(2024, 9, 4, 7, 18, 42,
+                               tzinfo=datetime.timezone.utc)
+        self.assertEqual(bucket_start(ts, 3600),
+                         datetime.datetime(2024, 9, 4, 7,
+                                           tzinfo=datetime.timezone.utc))
+
+    def test_changed_vote_moves_count(self):
+        """A changed vote moves its count from the old to the new choice."""
+        self.vote(self.choice1)
+        self.vote(self.choice2)
+        data = self.get_history('minute').json()
+        self.assertEqual(data['resolution'], 'minute')
+        self.assertEqual(len(data['buckets']), 1)
+        self.assertEqual([choice['counts'] for choice in data['choices']],
+                         [[0], [1]])
+
+    def test_batches_add_to_existing_buckets(self):
+        """Each batch adds its deltas to the stored buckets in one query."""
+        ts = datetime.datetime(2024, 9, 4, 7, 18, 42,
+                               tzinfo=datetime.timezone.utc)
+        first = [(self.question.id, None, self.choice1.id, ts)]
+        second = [(self.question.id, self.choice1.id, self.choice2.id, ts),
+                  (self.question.id, None, self.choice1.id, ts)]
+        apply_events(first)
+        with self.assertNumQueries(1):
+            apply_events(second)
+        self.assertEqual(
+            set(VoteBucket.objects.filter(resolution=3600)
+                .values_list('choice_id', 'delta')),
+            {(self.choice1.id, 1), (self.choice2.id, 1)})
+
+    def test_rebuild_matches_incremental(self):
+        """Rebuilding from the event log gives the same buckets."""
+        self.vote(self.choice1)
+        incremental = set(VoteBucket.objects.values_list(
+            'choice_id', 'resolution', 'start', 'delta'))
+        self.assertEqual(rebuild_buckets(), VoteEvent.objects.count() * 2)
+        self.assertEqual(set(VoteBucket.objects.values_list(
+            'choice_id', 'resolution', 'start', 'delta')), incremental)
+
+    def test_unknown_resolution(self):
+        """An unknown resolution is not found."""
+        self.assertEqual(self.get_history('fortnight').status_code, 404)
@@ -0,0 +1,80 @@
+import django.test
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from polls.models import Question
+from polls.routers import (PrimaryReplicaRouter, PRIMARY_PIN_SESSION_KEY,
+                           pin_primary, primary)
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+@override_settings(READ_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(django.test.SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_polls_reads_go_to_replica(self):
+        """Reads of polls models are sent to one of the replicas."""
+        self.assertIn(self.router.db_for_read(Question),
+                      ['replica1', 'replica2'])
+
+    def test_other_apps_read_from_primary(self):
+        """Auth data is always read from the primary."""
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_writes_go_to_primary(self):
+        """Every write is sent to the primary."""
+        self.assertEqual(self.router.db_for_write(Question), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        """Reads inside primary() are sent to the primary."""
+        with primary():
+            self.assertEqual(self.router.db_for_read(Question), 'default')
+        self.assertNotEqual(self.router.db_for_read(Question), 'default')
+
+    @override_settings(READ_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Without replicas everything stays on the primary."""
+        self.assertEqual(self.router.db_for_read(Question), 'default')
+
+
+class StickyPrimaryTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_user(username="voter")
+        cls.question = create_question("Sticky poll", choices=["Yes"])
+        cls.choice = cls.question.choice_set.get()
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def vote(self):
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': self.choice.id})
+
+    def test_vote_pins_user_to_primary(self):
+        """After voting the user's session is pinned to the primary."""
+        request = RequestFactory().post('/')
+        request.session = {}
+        with override_settings(READ_REPLICAS=['replica1'],
+                               PRIMARY_STICKY_SECONDS=5):
+            pin_primary(request)
+        self.assertIn(PRIMARY_PIN_SESSION_KEY, request.session)
+
+    @override_settings(PRIMARY_STICKY_SECONDS=5)
+    def test_no_pin_without_replicas(self):
+        """Without replicas a vote doesn't write the session pin."""
+        self.vote()
+        self.assertNotIn(PRIMARY_PIN_SESSION_KEY, self.client.session)
+
+    @override_settings(PRIMARY_STICKY_SECONDS=0)
+    def test_sticky_window_can_be_disabled(self):
+        """A zero window leaves the session untouched."""
+        request = RequestFactory().post('/')
+        request.session = {}
+        with override_settings(READ_REPLICAS=['replica1']):
+            pin_primary(request)
+        self.assertNotIn(PRIMARY_PIN_SESSION_KEY, request.session)
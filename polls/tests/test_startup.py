@@ -0,0 +1,42 @@
+import importlib
+
+import mysite.urls
+from django.test import SimpleTestCase
+from django.urls import clear_url_caches
+from polls.management.commands.bench_startup import (server_command,
+                                                      slowest_imports)
+
+
+class SlowestImportsTests(SimpleTestCase):
+
+    def test_sorted_by_cumulative_time(self):
+        """Imports are ranked by their cumulative import time."""
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   encodings.aliases",
+            "import time:       300 |       4200 | django.urls",
+            "import time:        50 |        900 | polls.models",
+        ])
+        self.assertEqual(slowest_imports(output, 2),
+                         [(4200, 'django.urls'), (900, 'polls.models')])
+
+    def test_gunicorn_is_the_default_server(self):
+        """The benchmark starts the server as deployed."""
+        command = server_command('gunicorn', 8001)
+        self.assertIn('gunicorn.conf.py', command)
+        self.assertEqual(command[-1], '127.0.0.1:8001')
+
+
+class DeploymentProfileTests(SimpleTestCase):
+
+    def test_voting_profile_serves_only_login_and_logout(self):
+        """Without the admin app, no account page lacks its templates."""
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, mysite.urls)
+        with self.modify_settings(
+                INSTALLED_APPS={'remove': 'django.contrib.admin'}):
+            urls = importlib.reload(mysite.urls)
+        names = {getattr(pattern, 'name', None)
+                 for pattern in urls.urlpatterns}
+        self.assertTrue({'login', 'logout'} <= names)
+        self.assertNotIn('password_change', names)
@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from polls.models import Vote
+from polls.cache import (USER_VOTES_SESSION_KEY, get_user_votes,
+                         user_votes_key)
+from polls.tests.utils import PollsTestCase, create_question, create_user
+
+
+class UserVotesTests(PollsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="voter")
+        cls.question = create_question("Poll", choices=["One", "Two"])
+        cls.choice1, cls.choice2 = cls.question.choice_set.order_by('id')
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="voter", password="Voter!123")
+
+    def vote(self, choice):
+        return self.client.post(reverse('polls:vote',
+                                        args=(self.question.id,)),
+                                {'choice': choice.id})
+
+    def test_votes_loaded_in_one_query(self):
+        """The vote map of a user is loaded with a single query."""
+        Vote.objects.create(user=self.user, choice=self.choice1)
+        with self.assertNumQueries(1):
+            user_votes = get_user_votes(self.user)
+        self.assertEqual(user_votes, {self.question.id: self.choice1.id})
+        with self.assertNumQueries(0):
+            get_user_votes(self.user)
+
+    def test_vote_updates_map(self):
+        """Voting and changing a vote update the cached map in place."""
+        self.vote(self.choice1)
+        self.assertEqual(get_user_votes(self.user),
+                         {self.question.id: self.choice1.id})
+        self.vote(self.choice2)
+        self.assertEqual(get_user_votes(self.user),
+                         {self.question.id: self.choice2.id})
+
+    def test_deleted_vote_is_forgotten(self):
+        """Deleting a vote drops it from the map."""
+        self.vote(self.choice1)
+        Vote.objects.filter(user=self.user).delete()
+        self.assertEqual(get_user_votes(self.user), {})
+
+    def test_detail_checks_user_choice(self):
+        """The detail page preselects the choice the user voted for."""
+        self.vote(self.choice2)
+        response = self.client.get(reverse('polls:detail',
+                                           args=(self.question.id,)))
+        self.assertEqual(response.context['user_choice_id'], self.choice2.id)
+
+    def test_index_shows_voted_status(self):
+        """The index page marks questions the user has voted on."""
+        response = self.client.get(reverse('polls:index'))
+        self.assertNotContains(response, "voted-status")
+        self.vote(self.choice1)
+        response = self.client.get(reverse('polls:index'))
+        self.assertContains(response, '<div class="voted-status">Voted</div>',
+                            html=True)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_map_not_cached_without_shared_cache(self):
+        """A process-local cache never holds a vote map."""
+        self.vote(self.choice1)
+        with self.assertNumQueries(1):
+            user_votes = get_user_votes(self.user)
+        self.assertEqual(user_votes, {self.question.id: self.choice1.id})
+        self.assertIsNone(cache.get(user_votes_key(self.user.id)))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_map_kept_in_session_without_shared_cache(self):
+        """The session keeps the map and a vote updates it in place."""
+        self.client.get(reverse('polls:index'))
+        self.assertIn(USER_VOTES_SESSION_KEY, self.client.session)
+        self.vote(self.choice2)
+        session = self.client.session
+        self.assertIn(USER_VOTES_SESSION_KEY, session)
+        with self.assertNumQueries(0):
+            user_votes = get_user_votes(self.user, session)
+        self.assertEqual(user_votes, {self.question.id: self.choice2.id})
@@ -1,29 +1,14 @@
-import datetime
-
-from django.test import TestCase
-from django.utils import timezone
-from polls.models import Question
 from django.urls import reverse
-from django.contrib.auth import get_user_model
-
-
-def create_question(question_text, days):
-    """
-    Create a question with the given `question_text` and published the
-    given number of `days` offset to now (negative for questions published
-    in the past, positive for questions that have yet to be published).
-    """
-    time = timezone.now() + datetime.timedelta(days=days)
-    return Question.objects.create(question_text=question_text, pub_date=time)
-
+from polls.tests.utils import PollsTestCase, create_question, create_user
 
-User = get_user_model()
 
+class VotingTests(PollsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(username="test", password="test123")
 
-class VotingTests(TestCase):
     def setUp(self):
-        self.user = User.objects.create_user(username="test",
-                                             password="test123")
+        super().setUp()
         self.client.login(username="test", password="test123")
 
     def test_visitor_cannot_vote(self):
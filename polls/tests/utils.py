@@ -0,0 +1,44 @@
+"""Shared helpers for the polls tests."""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+from polls.models import Question, Choice
+
+
+def create_question(question_text, days=0, end_days=None, choices=()):
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    An `end_days` offset sets the end date the same way, and each of
+    `choices` becomes a choice of the question.
+    """
+    now = timezone.now()
+    end_date = None
+    if end_days is not None:
+        end_date = now + datetime.timedelta(days=end_days)
+    question = Question.objects.create(
+        question_text=question_text,
+        pub_date=now + datetime.timedelta(days=days), end_date=end_date)
+    Choice.objects.bulk_create(
+        Choice(question=question, choice_text=choice_text)
+        for choice_text in choices)
+    return question
+
+
+def create_user(username, password="Voter!123", **kwargs):
+    """Create a user with a known password."""
+    return User.objects.create_user(username=username, password=password,
+                                    **kwargs)
+
+
+class PollsTestCase(TestCase):
+    """A TestCase that starts every test from an empty cache."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
@@ -4,8 +4,12 @@ from . import views
 app_name = 'polls'
 urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
+    path('ballot/', views.ballot, name='ballot'),
+    path('analytics/', views.analytics_report, name='analytics'),
     path('<int:pk>/', views.DetailView.as_view(), name='detail'),
     path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
+    path('<int:pk>/results/history/', views.results_history,
+         name='results_history'),
     path('<int:question_id>/vote/', views.vote, name='vote'),
 ]
 
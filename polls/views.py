@@ -6,16 +6,25 @@ This module includes the views for displaying and managing polls.
 
 import logging
 from django.shortcuts import get_object_or_404, render, redirect
-from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.contrib.auth import views as auth_views
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.forms import AuthenticationForm
+from django.http import (Http404, HttpResponseBadRequest,
+                         HttpResponseRedirect, JsonResponse)
 from django.contrib import messages
 from django.urls import reverse
 from django.views import generic
-from django.utils import timezone
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth.signals import (user_logged_in,
                                          user_logged_out, user_login_failed)
 from .models import Question, Choice, Vote
+from .auth import LOGIN_RETRY_AFTER, LoginThrottled
+from .routers import pin_primary, primary
+from .audit import record_vote_event, record_vote_events
+from .rollup import RESOLUTIONS, history
+from .cache import (get_choices, get_index, get_results, get_results_many,
+                    get_user_votes, record_user_vote, record_user_votes)
 
 
 logger = logging.getLogger("polls")
@@ -37,8 +46,15 @@ class IndexView(generic.ListView):
         """
         Return the last five published questions.
         """
-        return (Question.objects.filter(pub_date__lte=timezone.now()).
-                order_by('-pub_date'))
+        return get_index()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user_votes = get_user_votes(self.request.user,
+                                    self.request.session)
+        for question in context['latest_question_list']:
+            question.user_voted = question.id in user_votes
+        return context
 
 
 class DetailView(generic.DetailView):
@@ -56,7 +72,7 @@ class DetailView(generic.DetailView):
         """
         Excludes any questions that aren't published yet.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now())
+        return Question.objects.exclude(state=Question.State.SCHEDULED)
 
     def get(self, request, *args, **kwargs):
         try:
@@ -83,13 +99,10 @@ class DetailView(generic.DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        question = self.get_object()
-        try:
-            user_vote = Vote.objects.get(user=self.request.user,
-                                         choice__question=question)
-        except Vote.DoesNotExist:
-            user_vote = None
-        context['user_vote'] = user_vote
+        user_votes = get_user_votes(self.request.user,
+                                    self.request.session)
+        context['choices'] = get_choices(self.object.id)
+        context['user_choice_id'] = user_votes.get(self.object.id)
         return context
 
 
@@ -104,8 +117,14 @@ class ResultsView(generic.DetailView):
     model = Question
     template_name = 'polls/results.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['results'] = get_results(self.object.id)
+        return context
+
 
 @login_required
+@primary()
 def vote(request, question_id):
     """
     Handle voting process for each question.
@@ -124,30 +143,228 @@ def vote(request, question_id):
         selected_choice = question.choice_set.get(pk=request.POST['choice'])
     except (KeyError, Choice.DoesNotExist):
         messages.error(request, "You didn't select a choice")
-        return render(request, 'polls/detail.html', {'question': question})
+        return render(request, 'polls/detail.html',
+                      {'question': question,
+                       'choices': get_choices(question.id)})
+
+    this_user = request.user
+    with transaction.atomic():
+        try:
+            vote = Vote.objects.get(user=this_user,
+                                    choice__question=question)
+            old_choice_id = vote.choice_id
+            vote.choice = selected_choice
+            vote.save()
+            messages.success(request,
+                             f"Your vote was "
+                             f"changed to '{selected_choice.choice_text}'")
+        except Vote.DoesNotExist:
+            old_choice_id = None
+            vote = Vote.objects.create(user=this_user,
+                                       choice=selected_choice)
+            messages.success(request,
+                             f"You voted for '{selected_choice.choice_text}'")
+        # The event is committed, or rolled back, with the vote.
+        record_vote_event(this_user.id, question.id, old_choice_id,
+                          selected_choice.id, get_client_ip(request))
+
+    record_user_vote(this_user, question.id, selected_choice.id,
+                     request.session)
+    pin_primary(request)
+    return HttpResponseRedirect(reverse('polls:results', args=(question_id,)))
+
+
+BALLOT_FIELD_PREFIX = 'question_'
+
+
+@login_required
+@primary()
+def ballot(request):
+    """
+    Vote on every open question at once.
+
+    A GET shows all open questions on one form. A POST takes a
+    `question_<id>` field holding the chosen choice ID for each question
+    voted on, and records every vote in one transaction, or none of them
+    if any is invalid.
+    :param request: The Http request object.
+    :return: The ballot form, or the results of every question voted on.
+    """
+    if request.method != 'POST':
+        return render_ballot(request)
+
+    try:
+        selected = {
+            int(field[len(BALLOT_FIELD_PREFIX):]): int(value)
+            for field, value in request.POST.items()
+            if field.startswith(BALLOT_FIELD_PREFIX)}
+    except ValueError:
+        selected = None
+    if not selected:
+        messages.error(request, "You didn't select a choice")
+        return render_ballot(request)
+
+    choices = (Choice.objects.filter(pk__in=selected.values())
+               .select_related('question').in_bulk())
+    errors = []
+    for question_id, choice_id in selected.items():
+        choice = choices.get(choice_id)
+        if choice is None or choice.question_id != question_id:
+            errors.append(f"Invalid choice for question {question_id}")
+        elif not choice.question.can_vote():
+            errors.append(f"Voting is not allowed now for "
+                          f"'{choice.question.question_text}'")
+    if errors:
+        for error in errors:
+            messages.error(request, error)
+        return render_ballot(request, selected)
 
     this_user = request.user
+    old_choice_ids = {}
+    with transaction.atomic():
+        existing = Vote.objects.filter(
+            user=this_user, choice__question_id__in=selected
+        ).select_related('choice')
+        votes_by_question = {vote.choice.question_id: vote
+                             for vote in existing}
+        changed = []
+        for question_id, choice_id in selected.items():
+            vote = votes_by_question.get(question_id)
+            if vote is None:
+                old_choice_ids[question_id] = None
+            elif vote.choice_id != choice_id:
+                old_choice_ids[question_id] = vote.choice_id
+                vote.choice_id = choice_id
+                changed.append(vote)
+        Vote.objects.bulk_update(changed, ['choice'])
+        Vote.objects.bulk_create(
+            Vote(user=this_user, choice_id=selected[question_id])
+            for question_id, old_choice_id in old_choice_ids.items()
+            if old_choice_id is None)
+        record_vote_events(
+            this_user.id,
+            [(question_id, old_choice_id, selected[question_id])
+             for question_id, old_choice_id in old_choice_ids.items()],
+            get_client_ip(request))
+
+    record_user_votes(this_user, selected, request.session)
+    pin_primary(request)
+
+    messages.success(request, f"Your ballot with {len(selected)} "
+                              f"vote(s) was recorded")
+    questions = sorted({choice.question for choice in choices.values()},
+                       key=lambda question: question.id)
+    results = get_results_many([question.id for question in questions])
+    return render(request, 'polls/ballot_results.html',
+                  {'ballot_results': [(question, results[question.id])
+                                      for question in questions]})
+
+
+def render_ballot(request, selected=None):
+    """
+    Render the ballot form of every open question.
+    :param request: The Http request object.
+    :param selected: A dict of question id to the choice id to preselect,
+    defaults to the user's current votes.
+    """
+    if selected is None:
+        selected = get_user_votes(request.user, request.session)
+    questions = list(Question.objects.filter(state=Question.State.OPEN)
+                     .order_by('-pub_date').prefetch_related('choice_set'))
+    return render(request, 'polls/ballot.html', {
+        'ballot': [(question, BALLOT_FIELD_PREFIX + str(question.id),
+                    selected.get(question.id))
+                   for question in questions],
+    })
+
+
+def results_history(request, pk):
+    """
+    Return how the votes of a question evolved, for trend charts.
+    :param request: The Http request object, its `resolution` parameter
+    picks the bucket length (minute or hour, default hour).
+    :param pk: The ID of the question.
+    :return: JSON with the bucket start times and the running vote
+    totals of each choice.
+    """
+    question = get_object_or_404(
+        Question.objects.exclude(state=Question.State.SCHEDULED), pk=pk)
+    resolution = request.GET.get('resolution', 'hour')
+    if resolution not in RESOLUTIONS:
+        raise Http404(f"Unknown resolution '{resolution}'")
+    series = history(question, RESOLUTIONS[resolution])
+    return JsonResponse({'resolution': resolution, **series})
+
+
+@user_passes_test(lambda user: user.is_active and user.is_staff)
+def analytics_report(request):
+    """
+    Return cross-question analytics as JSON, for staff only.
+
+    The `report` parameter picks the analysis: `turnout` for every
+    question, `crosstab` of questions `a` and `b`, or `overlap` between
+    the questions given as repeated `question` parameters.
+    :param request: The Http request object.
+    :return: JSON with the requested report.
+    """
+    # NumPy is only loaded by workers that serve analytics.
+    from . import analytics
+
+    report = request.GET.get('report', 'turnout')
     try:
-        vote = Vote.objects.get(user=this_user, choice__question=question)
-        vote.choice = selected_choice
-        vote.save()
-        messages.success(request,
-                         f"Your vote was "
-                         f"changed to '{selected_choice.choice_text}'")
-        logger.info(
-            f"{this_user.username} changed vote for question_id {question_id} "
-            f"to choice_id {selected_choice.id} "
-            f"from {get_client_ip(request)}")
-    except Vote.DoesNotExist:
-        vote = Vote.objects.create(user=this_user, choice=selected_choice)
-        messages.success(request,
-                         f"You voted for '{selected_choice.choice_text}'")
-        logger.info(f"{this_user.username} submitted a "
-                    f"vote for question_id {question_id} "
-                    f"choice_id {selected_choice.id} "
-                    f"from {get_client_ip(request)}")
+        if report == 'turnout':
+            votes = analytics.load_votes()
+            return JsonResponse({'report': report, 'questions': [
+                {'id': question_id, 'voters': voters, 'rate': rate}
+                for question_id, (voters, rate)
+                in sorted(analytics.turnout(votes).items())]})
+        if report == 'crosstab':
+            question_a = int(request.GET['a'])
+            question_b = int(request.GET['b'])
+            votes = analytics.load_votes([question_a, question_b])
+            choices_a, choices_b, table = analytics.crosstab(
+                votes, question_a, question_b)
+            return JsonResponse({'report': report,
+                                 'rows': choices_a.tolist(),
+                                 'columns': choices_b.tolist(),
+                                 'counts': table.tolist()})
+        if report == 'overlap':
+            # A repeated question would share a column with its twin.
+            question_ids = list(dict.fromkeys(
+                int(question_id)
+                for question_id in request.GET.getlist('question')))
+            votes = analytics.load_votes(question_ids)
+            return JsonResponse({
+                'report': report, 'questions': question_ids,
+                'counts': analytics.overlap(votes, question_ids).tolist()})
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest(
+            f"Missing or invalid parameters for '{report}'")
+    return HttpResponseBadRequest(f"Unknown report '{report}'")
+
+
+class LoginView(auth_views.LoginView):
+    """
+    Django's login view, answering "try again" while logins are throttled.
 
-    return HttpResponseRedirect(reverse('polls:results', args=(question_id,)))
+    A login that can't get a password hashing slot is not a failed login,
+    so it gets a 503 asking the user to retry instead of a wrong username
+    or password error.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except LoginThrottled:
+            messages.error(request, "Too many people are logging in right "
+                                    "now, please try again in a moment.")
+            form = AuthenticationForm(
+                request, initial={'username': request.POST.get('username')})
+            response = self.render_to_response(
+                self.get_context_data(form=form))
+            response.status_code = 503
+            response['Retry-After'] = str(LOGIN_RETRY_AFTER)
+            return response
 
 
 def get_client_ip(request):